@@ -0,0 +1,277 @@
+# admission.py
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from fastapi import HTTPException
+import hashlib
+import hmac
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+# ====================================================
+#  🚦 Admission Control (API key registry + rate limit + load shedding)
+# ====================================================
+#
+#  API_KEYS_FILE (JSON) örneği:
+#  {"keys": [
+#     {"name": "gpt", "key": "...", "priority": "interactive",
+#      "compute": {"rate": 20, "burst": 40, "concurrency": 8},
+#      "render":  {"rate": 5,  "burst": 10, "concurrency": 4}},
+#     {"name": "batch", "key_sha256": "<hex>", "priority": "bulk"}
+#  ]}
+#  API_KEYS_FILE verilmemişse API_KEY tek bir interactive anahtar olarak kullanılır.
+#  Bu eski anahtar varsayılan olarak sınırsızdır (yalnızca pool kapasitesi uygulanır);
+#  istenirse şu env değişkenleriyle sınırlanır:
+#    API_KEY_COMPUTE_RATE / API_KEY_COMPUTE_BURST / API_KEY_COMPUTE_CONCURRENCY
+#    API_KEY_RENDER_RATE  / API_KEY_RENDER_BURST  / API_KEY_RENDER_CONCURRENCY
+
+POOLS = ("compute", "render")
+PRIORITIES = ("interactive", "bulk")
+
+@dataclass
+class Limits:
+    rate: float          # saniyede istek (token bucket dolum hızı)
+    burst: float         # bucket kapasitesi
+    concurrency: int     # aynı anda işlenen istek sayısı
+
+DEFAULT_LIMITS = {
+    "compute": Limits(rate=20.0, burst=40.0, concurrency=8),
+    "render":  Limits(rate=5.0,  burst=10.0, concurrency=4),
+}
+
+UNLIMITED = Limits(rate=math.inf, burst=math.inf, concurrency=sys.maxsize)
+
+@dataclass
+class KeyInfo:
+    name: str
+    digest: bytes
+    priority: str = "interactive"
+    limits: dict = field(default_factory=lambda: dict(DEFAULT_LIMITS))
+
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+# ====================================================
+#  🔑 KEY REGISTRY
+# ====================================================
+class KeyRegistry(ABC):
+    """Pluggable arayüz: lookup(token) -> KeyInfo | None (ör. veritabanı destekli registry)."""
+
+    @abstractmethod
+    def lookup(self, token: str) -> KeyInfo | None:
+        ...
+
+    @property
+    def configured(self) -> bool:
+        """False ise auth hiç kurulmamıştır (500). Özel registry'ler gerekirse override eder."""
+        return True
+
+class StaticKeyRegistry(KeyRegistry):
+    """Anahtarların sha256 özetlerini tutar; karşılaştırma sabit zamanlıdır."""
+
+    def __init__(self, keys: list[KeyInfo]):
+        self._keys = list(keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def configured(self) -> bool:
+        return bool(self._keys)
+
+    def lookup(self, token: str) -> KeyInfo | None:
+        d = _digest(token)
+        found = None
+        # erken çıkış yok: her anahtar her seferinde karşılaştırılır
+        for info in self._keys:
+            if hmac.compare_digest(d, info.digest) and found is None:
+                found = info
+        return found
+
+    @classmethod
+    def from_file(cls, path: str):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        keys = []
+        for entry in data.get("keys", []):
+            if "key_sha256" in entry:
+                digest = bytes.fromhex(entry["key_sha256"])
+            else:
+                digest = _digest(entry["key"])
+            priority = entry.get("priority", "interactive")
+            if priority not in PRIORITIES:
+                raise ValueError(f"{entry.get('name')}: unknown priority {priority!r}")
+            limits = dict(DEFAULT_LIMITS)
+            for pool in POOLS:
+                if pool in entry:
+                    base = DEFAULT_LIMITS[pool]
+                    limits[pool] = Limits(
+                        rate=float(entry[pool].get("rate", base.rate)),
+                        burst=float(entry[pool].get("burst", base.burst)),
+                        concurrency=int(entry[pool].get("concurrency", base.concurrency)),
+                    )
+            keys.append(KeyInfo(entry.get("name", f"key{len(keys)}"), digest, priority, limits))
+        return cls(keys)
+
+def _legacy_limits() -> dict:
+    limits = {}
+    for pool in POOLS:
+        prefix = f"API_KEY_{pool.upper()}_"
+        limits[pool] = Limits(
+            rate=float(os.getenv(prefix + "RATE", UNLIMITED.rate)),
+            burst=float(os.getenv(prefix + "BURST", UNLIMITED.burst)),
+            concurrency=int(os.getenv(prefix + "CONCURRENCY", UNLIMITED.concurrency)),
+        )
+    return limits
+
+def registry_from_env() -> KeyRegistry:
+    path = os.getenv("API_KEYS_FILE", "")
+    if path:
+        # yanlış yazılmış bir yol sessizce tek anahtara düşmesin
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"API_KEYS_FILE not found: {path}")
+        return StaticKeyRegistry.from_file(path)
+    service_key = os.getenv("API_KEY", "")
+    if service_key:
+        return StaticKeyRegistry([KeyInfo("default", _digest(service_key), limits=_legacy_limits())])
+    return StaticKeyRegistry([])
+
+# ====================================================
+#  🪣 TOKEN BUCKET
+# ====================================================
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate, self.burst = rate, burst
+        self.tokens = burst
+        self.ts = time.monotonic()
+
+    def take(self) -> float:
+        """Token alındıysa 0, değilse bir sonraki token'a kalan saniye. Kilit çağırana ait."""
+        if math.isinf(self.rate):
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.ts) * self.rate)
+        self.ts = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+# ====================================================
+#  🚦 CONTROLLER
+# ====================================================
+class Ticket:
+    def __init__(self, controller, key: bytes, pool: str, slots: int = 1):
+        self._controller, self.key, self.pool, self.slots = controller, key, pool, slots
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(self.key, self.pool, self.slots)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class AdmissionController:
+    """
+    Pool başına (compute / render) toplam kapasite; bulk anahtarlar kapasitenin
+    yalnızca bulk_share kadarını kullanabilir, kalan kısım interactive trafiğe ayrılır.
+    """
+
+    def __init__(self, registry: KeyRegistry, capacity: dict | None = None, bulk_share: float = 0.75):
+        self.registry = registry
+        self.capacity = capacity or {"compute": 32, "render": 8}
+        self.bulk_share = bulk_share
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._key_inflight = {}
+        self._pool_inflight = {pool: 0 for pool in POOLS}
+        self.rejected = {pool: 0 for pool in POOLS}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            registry_from_env(),
+            capacity={
+                "compute": int(os.getenv("ADMISSION_COMPUTE_CAPACITY", "32")),
+                "render": int(os.getenv("ADMISSION_RENDER_CAPACITY", "8")),
+            },
+            bulk_share=float(os.getenv("ADMISSION_BULK_SHARE", "0.75")),
+        )
+
+    def authenticate(self, Authorization: str | None) -> KeyInfo:
+        if not self.registry.configured:
+            raise HTTPException(500, detail="API_KEY not set.")
+        if Authorization is None or not Authorization.startswith("Bearer "):
+            raise HTTPException(401, detail="Missing Bearer header.")
+        info = self.registry.lookup(Authorization.split(" ", 1)[1])
+        if info is None:
+            raise HTTPException(403, detail="Invalid API_KEY.")
+        return info
+
+    def _reject(self, pool: str, detail: str, retry_after: float):
+        self.rejected[pool] += 1
+        raise HTTPException(429, detail=detail, headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+    def _pool_cap(self, info: KeyInfo, pool: str) -> int:
+        cap = self.capacity[pool]
+        if info.priority == "bulk":
+            cap = max(1, int(cap * self.bulk_share))
+        return cap
+
+    def max_slots(self, info: KeyInfo, pool: str) -> int:
+        """Tek bir isteğin tutabileceği en fazla slot (anahtar ve pool limitinin küçüğü)."""
+        return max(1, min(info.limits[pool].concurrency, self._pool_cap(info, pool)))
+
+    def acquire(self, pool: str, Authorization: str | None, slots: int = 1) -> Ticket:
+        """
+        Auth + limit kontrolü; başarılıysa release edilmesi gereken Ticket döner.
+        slots: isteğin kaç işçi kullandığı; hem anahtarın hem pool'un eşzamanlılığından düşülür.
+        """
+        info = self.authenticate(Authorization)
+        limits = info.limits[pool]
+        # sayaçlar ada değil anahtarın özetine bağlı: aynı adlı iki anahtar bucket paylaşmasın
+        slot = (info.digest, pool)
+
+        with self._lock:
+            if self._key_inflight.get(slot, 0) + slots > limits.concurrency:
+                self._reject(pool, "Concurrency limit reached for this API key.", 1)
+
+            if self._pool_inflight[pool] + slots > self._pool_cap(info, pool):
+                self._reject(pool, "Server busy, retry later.", 1)
+
+            bucket = self._buckets.get(slot)
+            if bucket is None:
+                bucket = self._buckets[slot] = TokenBucket(limits.rate, limits.burst)
+            wait = bucket.take()
+            if wait > 0:
+                self._reject(pool, "Rate limit exceeded for this API key.", wait)
+
+            self._key_inflight[slot] = self._key_inflight.get(slot, 0) + slots
+            self._pool_inflight[pool] += slots
+        return Ticket(self, info.digest, pool, slots)
+
+    def _release(self, key: bytes, pool: str, slots: int = 1):
+        with self._lock:
+            self._key_inflight[(key, pool)] -= slots
+            self._pool_inflight[pool] -= slots
+
+    def stats(self):
+        with self._lock:
+            return {
+                pool: {
+                    "inflight": self._pool_inflight[pool],
+                    "capacity": self.capacity[pool],
+                    "rejected": self.rejected[pool],
+                }
+                for pool in POOLS
+            }
+
+admission = AdmissionController.from_env()
@@ -1,11 +1,14 @@
 # app.py
 from fastapi import FastAPI, HTTPException, Header
 from pydantic import BaseModel, Field
+from typing import Literal
 from datetime import datetime, timedelta
 from dateutil import parser
 import pytz
 import swisseph as swe
-import os, requests, traceback, json
+import os, requests, traceback, json, threading
+from gazetteer import open_gazetteer
+from admission import admission
 
 # ====================================================
 #  🌌 Madam Dudu Astro Core (Compute Engine)
@@ -15,17 +18,37 @@ app = FastAPI(title="Madam Dudu Astro Core", version="2.4.0")
 
 # --- Env vars ---
 GOOGLE_KEY  = os.getenv("GOOGLE_MAPS_API_KEY", "")
+GOOGLE_API_BASE = os.getenv("GOOGLE_API_BASE", "https://maps.googleapis.com").rstrip("/")
 EPHE_PATH   = os.getenv("EPHE_PATH", "./ephe")
 SERVICE_KEY = os.getenv("API_KEY", "")
+GAZETTEER_PATH   = os.getenv("GAZETTEER_PATH", "./data/gazetteer.bin")
+GAZETTEER_SOURCE = os.getenv("GAZETTEER_SOURCE", "./data/cities15000.txt")
+COUNTRY_INFO     = os.getenv("GAZETTEER_COUNTRY_INFO", "./data/countryInfo.txt")
 
 # Swiss Ephemeris data path
 swe.set_ephe_path(EPHE_PATH)
 
+# pyswisseph durumu (ephe path, sid mode) thread-local: FastAPI sync endpoint'leri
+# threadpool'da çalışır ve ayarlanmamış thread sessizce Moshier'e düşer.
+_swe_local = threading.local()
+
+def ensure_ephe():
+    """Bu thread'de ephe path ve Lahiri sid mode'u bir kez ayarlar."""
+    if not getattr(_swe_local, "ready", False):
+        swe.set_ephe_path(EPHE_PATH)
+        swe.set_sid_mode(swe.SIDM_LAHIRI, 0, 0)
+        _swe_local.ready = True
+
+# Offline gazetteer (yoksa None -> sadece Google)
+GAZETTEER = open_gazetteer(GAZETTEER_PATH, GAZETTEER_SOURCE, COUNTRY_INFO)
+
 # --- Basic Checks ---
+if GAZETTEER is None:
+    print("⚠️ WARN: Offline gazetteer not found; city lookups use Google only.")
 if not GOOGLE_KEY:
-    print("⚠️ WARN: GOOGLE_MAPS_API_KEY not set; /compute will fail for city lookups.")
-if not SERVICE_KEY:
-    print("⚠️ WARN: API_KEY not set; /compute requires Authorization header.")
+    print("⚠️ WARN: GOOGLE_MAPS_API_KEY not set; cities missing from the gazetteer will fail.")
+if not SERVICE_KEY and not os.getenv("API_KEYS_FILE"):
+    print("⚠️ WARN: API_KEY / API_KEYS_FILE not set; /compute requires Authorization header.")
 
 # --- Zodiac & Constants ---
 ZODIAC = [
@@ -33,6 +56,13 @@ ZODIAC = [
     "Libra","Scorpio","Sagittarius","Capricorn","Aquarius","Pisces"
 ]
 
+PLANET_IDS = {
+    "Sun": swe.SUN, "Moon": swe.MOON, "Mercury": swe.MERCURY,
+    "Venus": swe.VENUS, "Mars": swe.MARS, "Jupiter": swe.JUPITER,
+    "Saturn": swe.SATURN, "Uranus": swe.URANUS,
+    "Neptune": swe.NEPTUNE, "Pluto": swe.PLUTO
+}
+
 # --- Log setup ---
 LOG_DIR = "logs"
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -53,7 +83,10 @@ class Input(BaseModel):
     city: str
     country: str
     zodiac: str = Field("Tropical", pattern="^(Tropical|Sidereal\\(Lahiri\\))$")
-    house_system: str = Field("Placidus", pattern="^(Placidus|WholeSign)$")
+    house_system: str = Field("Placidus", pattern="^(Placidus|WholeSign|Koch|Equal|Porphyry)$")
+    house_systems: list[Literal["Placidus", "WholeSign", "Koch", "Equal", "Porphyry"]] | None = Field(
+        None, description="Yan yana hesaplanacak ek ev sistemleri"
+    )
     mode: str = Field("manual", pattern="^(manual|auto)$")
     time_uncertainty_minutes: int | None = Field(15, ge=1, le=180)
 
@@ -79,6 +112,49 @@ def build_whole_sign_cusps(anchor_sign_idx: int):
     base = (anchor_sign_idx * 30.0) % 360.0
     return [round((base + k*30.0) % 360.0, 2) for k in range(12)]
 
+# Swiss Ephemeris hsys kodları; Equal ve WholeSign ASC'den doğrudan türetilir
+HOUSE_CODES = {"Placidus": b'P', "Koch": b'K', "Porphyry": b'O'}
+
+class HouseFrame:
+    """
+    Bir harita için ortak büyüklükler (ARMC, eğiklik, ASC/MC) bir kez hesaplanır;
+    her ev sistemi bunları kullanır ve sonucu cache'lenir.
+    """
+
+    def __init__(self, jd_ut: float, lat: float, lon: float, sidereal: bool = False):
+        self.lat = lat
+        self.armc = (swe.sidtime(jd_ut) * 15.0 + lon) % 360.0
+        self.eps = swe.calc_ut(jd_ut, swe.ECL_NUT)[0][0]
+        # sidereal ise tüm boylamlar ayanamsa kadar kaydırılır (sid mode çağıran tarafından ayarlanır).
+        # Nütasyonlu (true) ayanamsa: sidereal gezegenler ve houses_ex de bunu kullanır.
+        self.ayanamsa = swe.get_ayanamsa_ex_ut(jd_ut, swe.FLG_SWIEPH)[1] if sidereal else 0.0
+        _cusps, ascmc = swe.houses_armc(self.armc, lat, self.eps, b'E')
+        self.asc = (ascmc[0] - self.ayanamsa) % 360.0
+        self.mc = (ascmc[1] - self.ayanamsa) % 360.0
+        self._cache = {}
+
+    def cusps(self, system: str):
+        if system not in self._cache:
+            if system == "WholeSign":
+                cusps = build_whole_sign_cusps(sign_index_from_lon(self.asc))
+            elif system == "Equal":
+                cusps = [round((self.asc + k*30.0) % 360.0, 2) for k in range(12)]
+            else:
+                raw, _ascmc = swe.houses_armc(self.armc, self.lat, self.eps, HOUSE_CODES[system])
+                cusps = [round((h - self.ayanamsa) % 360.0, 2) for h in raw[:12]]
+            self._cache[system] = cusps
+        return self._cache[system]
+
+    def payload(self, system: str):
+        """Hesaplanamayan sistem (ör. yüksek enlemde Placidus/Koch) haritayı düşürmez; error döner."""
+        try:
+            return {"system": system, "cusps_longitudes": self.cusps(system)}
+        except swe.Error:
+            return {"system": system, "error": self.unsupported(system)}
+
+    def unsupported(self, system: str) -> str:
+        return f"{system} houses cannot be computed at latitude {self.lat:.2f}."
+
 def planet_payload(xx0: float, speed_lon: float):
     s, d, lon = sign_deg(xx0)
     return {
@@ -92,8 +168,23 @@ def planet_payload(xx0: float, speed_lon: float):
 #  🌍 GEO HELPERS
 # ====================================================
 def geocode_to_latlon(city: str, country: str):
+    if GAZETTEER is not None:
+        hit = GAZETTEER.lookup(city, country)
+        if hit is not None:
+            return hit
+    try:
+        return google_geocode(city, country)
+    except HTTPException as he:
+        # bulunamadıysa gazetteer'ın fuzzy önerilerini mesaja ekle (otomatik seçilmez)
+        if he.status_code == 400 and GAZETTEER is not None:
+            names = [f"{s['name']} ({s['country_code']})" for s in GAZETTEER.suggest(city, country)]
+            if names:
+                raise HTTPException(400, detail=f"{he.detail} Öneriler: {', '.join(names)}")
+        raise
+
+def google_geocode(city: str, country: str):
     q = f"{city}, {country}"
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
+    url = f"{GOOGLE_API_BASE}/maps/api/geocode/json"
     r = requests.get(url, params={"address": q, "key": GOOGLE_KEY}, timeout=15)
     if r.status_code != 200:
         raise HTTPException(502, detail="Geocoding servisi cevap vermedi.")
@@ -104,7 +195,7 @@ def geocode_to_latlon(city: str, country: str):
     return float(loc["lat"]), float(loc["lng"])
 
 def latlon_to_tzid(lat: float, lon: float, utc_ts: int):
-    url = "https://maps.googleapis.com/maps/api/timezone/json"
+    url = f"{GOOGLE_API_BASE}/maps/api/timezone/json"
     r = requests.get(url, params={"location": f"{lat},{lon}", "timestamp": utc_ts, "key": GOOGLE_KEY}, timeout=15)
     if r.status_code != 200:
         raise HTTPException(502, detail="Time Zone servisi cevap vermedi.")
@@ -113,6 +204,88 @@ def latlon_to_tzid(lat: float, lon: float, utc_ts: int):
         raise HTTPException(400, detail="Time Zone bulunamadı.")
     return data["timeZoneId"]
 
+# ====================================================
+#  🔭 ASPECTS
+# ====================================================
+ASPECTS = {
+    "Conjunction": 0.0, "Sextile": 60.0, "Square": 90.0,
+    "Trine": 120.0, "Opposition": 180.0
+}
+ASPECT_ORB = 6.0
+
+def find_aspects(planets: dict, orb: float = ASPECT_ORB):
+    """planets: {name: {"ecliptic_long": ...}} -> major aspect listesi"""
+    names = list(planets.keys())
+    found = []
+    for a in range(len(names)):
+        for b in range(a + 1, len(names)):
+            la = planets[names[a]]["ecliptic_long"]
+            lb = planets[names[b]]["ecliptic_long"]
+            sep = abs(la - lb) % 360.0
+            if sep > 180.0:
+                sep = 360.0 - sep
+            for asp, angle in ASPECTS.items():
+                diff = abs(sep - angle)
+                if diff <= orb:
+                    found.append({"p1": names[a], "p2": names[b], "aspect": asp, "orb": round(diff, 2)})
+                    break
+    return found
+
+def planets_for_render(planets: dict):
+    """compute çıktısındaki planets dict'ini draw_chart'ın beklediği listeye çevirir."""
+    return [{"name": n, "ecliptic_long": p["ecliptic_long"]} for n, p in planets.items()]
+
+# ====================================================
+#  🧮 COMPUTE PIPELINE
+# ====================================================
+def compute_positions(i: Input):
+    """Geo + timezone + ephemeris + houses. Auth kontrolü çağırana aittir."""
+    # --- GEO + TIMEZONE ---
+    lat, lon = geocode_to_latlon(i.city.strip(), i.country.strip())
+    tzid = latlon_to_tzid(lat, lon, int(datetime.utcnow().timestamp()))
+    tz = pytz.timezone(tzid)
+
+    tob = i.tob or "12:00"
+    local_dt = tz.localize(parser.parse(f"{i.dob} {tob}"), is_dst=None)
+    utc_dt = local_dt.astimezone(pytz.UTC)
+    jd_ut = jd_from_dt(utc_dt)
+
+    # --- FLAGS ---
+    ensure_ephe()
+    flag = swe.FLG_SWIEPH
+    if i.zodiac.startswith("Sidereal"):
+        swe.set_sid_mode(swe.SIDM_LAHIRI, 0, 0)
+        flag |= swe.FLG_SIDEREAL
+
+    # --- PLANETS ---
+    planets = {}
+    for name, pid in PLANET_IDS.items():
+        xx, _rf = swe.calc_ut(jd_ut, pid, flag)
+        planets[name] = planet_payload(xx[0], xx[3])
+
+    # --- ASC & HOUSES ---
+    frame = HouseFrame(jd_ut, lat, lon, sidereal=i.zodiac.startswith("Sidereal"))
+    asc_sign, asc_deg, asc_lon = sign_deg(frame.asc)
+    try:
+        houses_payload = {"system": i.house_system, "cusps_longitudes": frame.cusps(i.house_system)}
+    except swe.Error:
+        raise HTTPException(400, detail=f"{frame.unsupported(i.house_system)} Try WholeSign, Equal or Porphyry.")
+
+    # --- RESULT ---
+    result = {
+        "input": i.dict(),
+        "lat": lat, "lon": lon, "tzid": tzid,
+        "datetime_local": local_dt.strftime("%Y-%m-%d %H:%M:%S %Z"),
+        "datetime_utc": utc_dt.strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "ascendant": {"sign": asc_sign, "degree": asc_deg, "ecliptic_long": asc_lon},
+        "houses": houses_payload,
+        "planets": planets,
+        "engine_version": "2.4.0"
+    }
+    if i.house_systems:
+        result["house_systems"] = {hs: frame.payload(hs) for hs in i.house_systems}
+    return result
+
 # ====================================================
 #  🌡️ HEALTH CHECK
 # ====================================================
@@ -126,62 +299,14 @@ def health():
 @app.post("/compute")
 def compute(i: Input, Authorization: str | None = Header(default=None)):
     try:
-        # --- AUTH ---
-        if not SERVICE_KEY:
-            raise HTTPException(500, detail="Sunucu API_KEY tanımlı değil.")
-        if Authorization is None or not Authorization.startswith("Bearer "):
-            raise HTTPException(401, detail="Authorization: Bearer <API_KEY> gerekli.")
-        if Authorization.split(" ", 1)[1] != SERVICE_KEY:
-            raise HTTPException(403, detail="Geçersiz API_KEY.")
-
-        # --- GEO + TIMEZONE ---
-        lat, lon = geocode_to_latlon(i.city.strip(), i.country.strip())
-        tzid = latlon_to_tzid(lat, lon, int(datetime.utcnow().timestamp()))
-        tz = pytz.timezone(tzid)
-
-        tob = i.tob or "12:00"
-        local_dt = tz.localize(parser.parse(f"{i.dob} {tob}"), is_dst=None)
-        utc_dt = local_dt.astimezone(pytz.UTC)
-        jd_ut = jd_from_dt(utc_dt)
-
-        # --- FLAGS ---
-        flag = swe.FLG_SWIEPH
-        if i.zodiac.startswith("Sidereal"):
-            swe.set_sid_mode(swe.SIDM_LAHIRI, 0, 0)
-            flag |= swe.FLG_SIDEREAL
-
-        # --- PLANETS ---
-        planets = {}
-        PLANET_IDS = {
-            "Sun": swe.SUN, "Moon": swe.MOON, "Mercury": swe.MERCURY,
-            "Venus": swe.VENUS, "Mars": swe.MARS, "Jupiter": swe.JUPITER,
-            "Saturn": swe.SATURN, "Uranus": swe.URANUS,
-            "Neptune": swe.NEPTUNE, "Pluto": swe.PLUTO
-        }
-
-        for name, pid in PLANET_IDS.items():
-            xx, _rf = swe.calc_ut(jd_ut, pid, flag)
-            planets[name] = planet_payload(xx[0], xx[3])
-
-        # --- ASC & HOUSES ---
-        houses, ascmc = swe.houses(jd_ut, lat, lon, b'P')
-        asc_sign, asc_deg, asc_lon = sign_deg(ascmc[0])
-        houses_payload = {"system": "Placidus", "cusps_longitudes": [round(h, 2) for h in houses]}
-
-        # --- RESULT ---
-        return {
-            "input": i.dict(),
-            "lat": lat, "lon": lon, "tzid": tzid,
-            "datetime_local": local_dt.strftime("%Y-%m-%d %H:%M:%S %Z"),
-            "datetime_utc": utc_dt.strftime("%Y-%m-%d %H:%M:%S UTC"),
-            "ascendant": {"sign": asc_sign, "degree": asc_deg, "ecliptic_long": asc_lon},
-            "houses": houses_payload,
-            "planets": planets,
-            "engine_version": "2.4.0"
-        }
+        # --- AUTH + ADMISSION (rate limit / concurrency / load shedding) ---
+        with admission.acquire("compute", Authorization):
+            return compute_positions(i)
 
     except HTTPException as he:
-        log_error(he)
+        # 429 = load shedding; yük altında her biri için traceback yazmak diski doldurur
+        if he.status_code != 429:
+            log_error(he)
         raise he
     except Exception as e:
         log_error(e)
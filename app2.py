@@ -2,11 +2,20 @@
 from fastapi import FastAPI, Body, Header, HTTPException
 from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+from typing import Literal
+from dateutil import parser
 from chart_utils import draw_chart
-from app import app as compute_app
+from app import app as compute_app, Input, compute_positions, find_aspects, planets_for_render
+from app import PLANET_IDS, jd_from_dt
+from events import EVENT_KINDS, EVENTS_MAX_RANGE_DAYS, ephemeris_covers, search_events, search_events_parallel
+from admission import admission
+from canvas_pool import canvas_pool
 from io import BytesIO
 import os
 import io
+import json
 import uuid
 import time
 import traceback
@@ -20,9 +29,8 @@ app = FastAPI(
 
 app.mount("/compute", compute_app)
 
-SERVICE_KEY = os.getenv("API_KEY", "")
-if not SERVICE_KEY:
-    print("⚠️ WARNING: API_KEY not set. Set API_KEY in environment variables.")
+if not admission.registry.configured:
+    print("⚠️ WARNING: API_KEY not set. Set API_KEY or API_KEYS_FILE in environment variables.")
 
 TEMP_DIR = "/tmp/charts"
 os.makedirs(TEMP_DIR, exist_ok=True)
@@ -44,65 +52,131 @@ def cleanup_old_files():
         if os.path.isfile(fpath) and now - os.path.getmtime(fpath) > 3600:
             os.remove(fpath)
 
-@app.post("/render")
-def render_chart(payload: dict = Body(...), Authorization: str | None = Header(default=None)):
-    log_debug("🧠 /render endpoint triggered.")
-    try:
-        if not SERVICE_KEY:
-            raise HTTPException(500, detail="API_KEY not set.")
-        if Authorization is None or not Authorization.startswith("Bearer "):
-            raise HTTPException(401, detail="Missing Bearer header.")
-        if Authorization.split(" ", 1)[1] != SERVICE_KEY:
-            raise HTTPException(403, detail="Invalid API_KEY.")
+def as_png_bytes(result) -> bytes:
+    """draw_chart çıktısını (bytes / BytesIO) düz bytes'a çevirir."""
+    if isinstance(result, BytesIO):
+        return result.getvalue()
+    if isinstance(result, (bytes, bytearray)):
+        return bytes(result)
+    raise HTTPException(500, detail="draw_chart() did not return valid bytes.")
 
-        planets = payload.get("planets")
-        if not isinstance(planets, list) or not planets:
-            raise HTTPException(400, detail="'planets' list is required.")
+def save_chart(img_bytes: bytes) -> str:
+    """PNG'yi TEMP_DIR'a yazar, public URL döndürür."""
+    cleanup_old_files()
+    file_id = uuid.uuid4().hex
+    file_path = os.path.join(TEMP_DIR, f"chart_{file_id}.png")
 
-        log_debug(f"🪐 Planets received: {len(planets)} items.")
+    try:
+        with open(file_path, "wb") as f:
+            f.write(img_bytes)
+        log_debug(f"💾 Chart saved: {file_path}")
+    except Exception as e:
+        log_debug(f"❌ Failed to save chart: {e}")
+        raise HTTPException(500, detail=f"Could not write file.")
 
-        try:
-            log_debug("🎨 Calling draw_chart() ...")
-            img_bytes = draw_chart(
-                planets=planets,
-                name=payload.get("name"),
-                dob=payload.get("dob"),
-                tob=payload.get("tob"),
-                city=payload.get("city"),
-                country=payload.get("country"),
-            )
-            log_debug(f"✅ draw_chart() returned type: {type(img_bytes)}")
-        except Exception as e:
-            tb = traceback.format_exc()
-            error_log = os.path.join(TEMP_DIR, "errors.log")
-            with open(error_log, "a") as f:
-                f.write(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S')}] DRAW_CHART ERROR:\n{tb}\n")
-            log_debug(f"💥 draw_chart() failed: {e}")
-            raise HTTPException(500, detail=f"Draw chart failed: {e}")
+    public_url = f"https://madam-dudu-astro-core-1.onrender.com/charts/chart_{file_id}.png"
+    log_debug(f"🌐 Returning URL: {public_url}")
+    return public_url
 
-        if not isinstance(img_bytes, (bytes, bytearray)):
-            log_debug("💥 draw_chart() did not return bytes.")
-            raise HTTPException(500, detail="draw_chart() did not return valid bytes.")
+@app.post("/render")
+def render_chart(payload: dict = Body(...), Authorization: str | None = Header(default=None)):
+    log_debug("🧠 /render endpoint triggered.")
+    try:
+        with admission.acquire("render", Authorization):
+            planets = payload.get("planets")
+            if not isinstance(planets, list) or not planets:
+                raise HTTPException(400, detail="'planets' list is required.")
+
+            log_debug(f"🪐 Planets received: {len(planets)} items.")
+
+            try:
+                log_debug("🎨 Calling draw_chart() ...")
+                img_bytes = draw_chart(
+                    planets=planets,
+                    name=payload.get("name"),
+                    dob=payload.get("dob"),
+                    tob=payload.get("tob"),
+                    city=payload.get("city"),
+                    country=payload.get("country"),
+                )
+                log_debug(f"✅ draw_chart() returned type: {type(img_bytes)}")
+            except HTTPException:
+                # canvas bütçesi dolu (503) vb.
+                raise
+            except Exception as e:
+                tb = traceback.format_exc()
+                error_log = os.path.join(TEMP_DIR, "errors.log")
+                with open(error_log, "a") as f:
+                    f.write(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S')}] DRAW_CHART ERROR:\n{tb}\n")
+                log_debug(f"💥 draw_chart() failed: {e}")
+                raise HTTPException(500, detail=f"Draw chart failed: {e}")
+
+            img_bytes = as_png_bytes(img_bytes)
+            public_url = save_chart(img_bytes)
+
+            if payload.get("as_url", True):
+                return JSONResponse({"url": public_url})
+            else:
+                return StreamingResponse(io.BytesIO(img_bytes), media_type="image/png")
 
-        cleanup_old_files()
-        file_id = uuid.uuid4().hex
-        file_path = os.path.join(TEMP_DIR, f"chart_{file_id}.png")
+    except HTTPException as e:
+        log_debug(f"⚠️ HTTPException: {e.detail}")
+        raise
+    except Exception as e:
+        tb = traceback.format_exc()
+        log_debug(f"💥 Unhandled exception:\n{tb}")
+        raise HTTPException(500, detail="Unexpected server error")
 
+# --- /chart: compute + render tek pipeline ---
+class ChartInput(Input):
+    stream: bool = False
+
+def _render_positions(i: Input, result: dict) -> str:
+    img_bytes = draw_chart(
+        planets=planets_for_render(result["planets"]),
+        name=i.name,
+        dob=i.dob,
+        tob=i.tob,
+        city=i.city,
+        country=i.country,
+    )
+    return save_chart(as_png_bytes(img_bytes))
+
+@app.post("/chart")
+def chart(i: ChartInput, Authorization: str | None = Header(default=None)):
+    """
+    Geo + ephemeris + aspects + render tek istekte.
+    stream=true ise NDJSON: önce pozisyonlar, render bitince {"url": ...}.
+    """
+    log_debug("🧠 /chart endpoint triggered.")
+    try:
+        # render slotu baştan alınır ki dolu pool'da compute boşa yapılmasın
+        render_ticket = admission.acquire("render", Authorization)
         try:
-            with open(file_path, "wb") as f:
-                f.write(img_bytes)
-            log_debug(f"💾 Chart saved: {file_path}")
-        except Exception as e:
-            log_debug(f"❌ Failed to save chart: {e}")
-            raise HTTPException(500, detail=f"Could not write file.")
-
-        public_url = f"https://madam-dudu-astro-core-1.onrender.com/charts/chart_{file_id}.png"
-        log_debug(f"🌐 Returning URL: {public_url}")
-
-        if payload.get("as_url", True):
-            return JSONResponse({"url": public_url})
-        else:
-            return StreamingResponse(io.BytesIO(img_bytes), media_type="image/png")
+            with admission.acquire("compute", Authorization):
+                result = compute_positions(i)
+                result["aspects"] = find_aspects(result["planets"])
+        except BaseException:
+            render_ticket.release()
+            raise
+
+        if i.stream:
+            def events():
+                yield json.dumps(result) + "\n"
+                try:
+                    yield json.dumps({"url": _render_positions(i, result)}) + "\n"
+                except Exception as e:
+                    log_debug(f"💥 /chart render failed: {e}")
+                    detail = e.detail if isinstance(e, HTTPException) else "Draw chart failed"
+                    yield json.dumps({"error": detail}) + "\n"
+                finally:
+                    render_ticket.release()
+            return StreamingResponse(events(), media_type="application/x-ndjson",
+                                     background=BackgroundTask(render_ticket.release))
+
+        with render_ticket:
+            result["url"] = _render_positions(i, result)
+        return JSONResponse(result)
 
     except HTTPException as e:
         log_debug(f"⚠️ HTTPException: {e.detail}")
@@ -112,6 +186,58 @@ def render_chart(payload: dict = Body(...), Authorization: str | None = Header(d
         log_debug(f"💥 Unhandled exception:\n{tb}")
         raise HTTPException(500, detail="Unexpected server error")
 
+# --- /events: ingress / station / exact aspect arama ---
+class EventSearchInput(BaseModel):
+    start: str = Field(..., description="YYYY-MM-DD (UTC)")
+    end: str = Field(..., description="YYYY-MM-DD (UTC)")
+    planets: list[str] | None = None
+    kinds: list[Literal["ingress", "station", "aspect"]] = list(EVENT_KINDS)
+    natal: dict[str, float] | None = Field(None, description="{name: ecliptic_long} natal noktalar")
+    zodiac: str = Field("Tropical", pattern="^(Tropical|Sidereal\\(Lahiri\\))$")
+    workers: int = Field(1, ge=1, le=16)
+
+@app.post("/events")
+def find_events(q: EventSearchInput, Authorization: str | None = Header(default=None)):
+    """Event'leri bulundukça NDJSON olarak stream eder."""
+    log_debug("🧠 /events endpoint triggered.")
+    info = admission.authenticate(Authorization)
+
+    unknown = [p for p in (q.planets or []) if p not in PLANET_IDS]
+    if unknown:
+        raise HTTPException(400, detail=f"Unknown planets: {unknown}")
+    try:
+        start_jd = jd_from_dt(parser.parse(q.start))
+        end_jd = jd_from_dt(parser.parse(q.end))
+    except (ValueError, OverflowError):
+        raise HTTPException(400, detail="Invalid start/end date.")
+    if end_jd <= start_jd:
+        raise HTTPException(400, detail="'end' must be after 'start'.")
+    if end_jd - start_jd > EVENTS_MAX_RANGE_DAYS:
+        raise HTTPException(400, detail=f"Range too long; at most {EVENTS_MAX_RANGE_DAYS:g} days per request.")
+    if not (ephemeris_covers(start_jd) and ephemeris_covers(end_jd)):
+        raise HTTPException(400, detail="Dates outside the installed ephemeris range.")
+
+    # her worker bir compute slot'u tutar; anahtarın/pool'un izin verdiğinden fazlası kırpılır
+    workers = min(q.workers, admission.max_slots(info, "compute"))
+    ticket = admission.acquire("compute", Authorization, slots=workers)
+    opts = dict(planets=q.planets, kinds=q.kinds, natal=q.natal, sidereal=q.zodiac.startswith("Sidereal"))
+    if workers > 1:
+        found = search_events_parallel(start_jd, end_jd, workers=workers, **opts)
+    else:
+        found = search_events(start_jd, end_jd, **opts)
+
+    def lines():
+        try:
+            for ev in found:
+                yield json.dumps(ev) + "\n"
+        except Exception as e:
+            log_debug(f"💥 /events failed: {e}")
+            yield json.dumps({"error": "Event search failed"}) + "\n"
+        finally:
+            ticket.release()
+    return StreamingResponse(lines(), media_type="application/x-ndjson", background=BackgroundTask(ticket.release))
+
 @app.get("/health")
 def unified_health():
-    return {"ok": True, "service": "Madam Dudu Astro Core Unified", "version": "3.2.0-debug"}
+    return {"ok": True, "service": "Madam Dudu Astro Core Unified", "version": "3.2.0-debug",
+            "admission": admission.stats(), "render_memory": canvas_pool.stats()}
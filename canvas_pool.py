@@ -0,0 +1,156 @@
+# canvas_pool.py
+from contextlib import contextmanager
+from fastapi import HTTPException
+from PIL import Image
+import math
+import os
+import threading
+import time
+
+# ====================================================
+#  🖼️ Canvas Pool (reset instead of reallocate, memory budget per worker)
+# ====================================================
+#
+#  Render başına 1800x1800 RGB (Pillow içinde 4 byte/piksel ~13 MB) yeniden
+#  ayırmak yerine canvas'lar havuzda tutulur ve paste ile sıfırlanır.
+#  Toplam canvas belleği RENDER_MEMORY_BUDGET_MB'ı aşmaz; bütçe doluysa
+#  boştaki başka boyut/mod canvas'ları atılır, o da yoksa istek en fazla
+#  RENDER_CANVAS_WAIT_S bekler, sonra 503 + Retry-After döner (render slotu
+#  süresiz tutulmasın; varsayılan bütçe 5 RGB canvas, render kapasitesi 8).
+
+RENDER_MEMORY_MODE = os.getenv("RENDER_MEMORY_MODE", "pooled")        # pooled | fresh
+RENDER_MEMORY_BUDGET_MB = float(os.getenv("RENDER_MEMORY_BUDGET_MB", "64"))
+RENDER_CANVAS_WAIT_S = float(os.getenv("RENDER_CANVAS_WAIT_S", "5"))
+
+# Pillow'un iç piksel boyutu (RGB de 4 byte tutulur)
+_PIXEL_BYTES = {"1": 1, "L": 1, "P": 1, "LA": 4, "RGB": 4, "RGBA": 4, "I": 4, "F": 4}
+
+def canvas_bytes(mode: str, size: tuple) -> int:
+    return size[0] * size[1] * _PIXEL_BYTES.get(mode, 4)
+
+class CanvasPool:
+    def __init__(self, budget_bytes: int, wait_timeout: float = RENDER_CANVAS_WAIT_S):
+        self.budget = budget_bytes
+        self.wait_timeout = wait_timeout
+        self._cond = threading.Condition()
+        self._free = {}          # (mode, size, palette_key) -> [Image]
+        self._allocated = 0      # havuzdaki tüm canvas'lar (boşta + kullanımda)
+        self._in_use = 0
+        self._keys = {}          # id(img) -> key (kullanımdaki canvas'lar)
+        self.peak = 0
+        self.allocs = 0
+        self.reuses = 0
+        self.evictions = 0
+        self.waits = 0
+        self.timeouts = 0
+
+    def _evict_idle(self, keep) -> bool:
+        for key, imgs in self._free.items():
+            if key != keep and imgs:
+                imgs.pop()
+                self._allocated -= canvas_bytes(key[0], key[1])
+                self.evictions += 1
+                return True
+        return False
+
+    def acquire(self, mode: str, size: tuple, fill=0, palette: list | None = None,
+                template: Image.Image | None = None) -> Image.Image:
+        """
+        Sıfırlanmış bir canvas döndürür: template verilirse onun kopyası, yoksa fill rengi.
+        P modunda palette (düz RGB listesi) sabitlenir; fill RGB ise index'e çevrilir.
+        """
+        key = (mode, size, tuple(palette) if palette else None)
+        nbytes = canvas_bytes(mode, size)
+        img = None
+        deadline = time.monotonic() + self.wait_timeout
+        with self._cond:
+            while True:
+                if self._free.get(key):
+                    img = self._free[key].pop()
+                    self.reuses += 1
+                    break
+                if self._allocated + nbytes <= self.budget:
+                    break
+                if self._evict_idle(key):
+                    continue
+                if self._in_use == 0:
+                    # tek canvas bütçeden büyük; yine de tek başına çizilebilsin
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise HTTPException(503, detail="Render memory busy, retry later.",
+                                        headers={"Retry-After": str(max(1, math.ceil(self.wait_timeout)))})
+                self.waits += 1
+                self._cond.wait(remaining)
+            if img is None:
+                self._allocated += nbytes
+                self.allocs += 1
+            self._in_use += nbytes
+            self.peak = max(self.peak, self._allocated)
+
+        if img is None:
+            img = Image.new(mode, size)
+        if palette:
+            # çizim sırasında eklenen renkler bir sonraki kullanıma taşınmasın
+            img.putpalette(palette)
+        if template is not None:
+            img.paste(template, (0, 0))
+        else:
+            if mode == "P" and isinstance(fill, tuple):
+                fill = img.palette.getcolor(fill, img)
+            img.paste(fill, (0, 0, size[0], size[1]))
+        img.info.pop("transparency", None)
+        with self._cond:
+            self._keys[id(img)] = key
+        return img
+
+    def release(self, img: Image.Image):
+        nbytes = canvas_bytes(img.mode, img.size)
+        with self._cond:
+            key = self._keys.pop(id(img))
+            self._in_use -= nbytes
+            if self._allocated <= self.budget:
+                self._free.setdefault(key, []).append(img)
+            else:
+                self._allocated -= nbytes
+            self._cond.notify()
+
+    @contextmanager
+    def canvas(self, mode: str, size: tuple, fill=0, palette: list | None = None,
+               template: Image.Image | None = None):
+        img = self.acquire(mode, size, fill, palette, template)
+        try:
+            yield img
+        finally:
+            self.release(img)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "mode": RENDER_MEMORY_MODE,
+                "budget_mb": round(self.budget / 2**20, 1),
+                "allocated_mb": round(self._allocated / 2**20, 1),
+                "in_use_mb": round(self._in_use / 2**20, 1),
+                "peak_mb": round(self.peak / 2**20, 1),
+                "idle_canvases": sum(len(v) for v in self._free.values()),
+                "allocs": self.allocs,
+                "reuses": self.reuses,
+                "evictions": self.evictions,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+            }
+
+canvas_pool = CanvasPool(int(RENDER_MEMORY_BUDGET_MB * 2**20))
+
+# --- template cache: şablon bir kez açılıp dönüştürülür ---
+_templates = {}
+_templates_lock = threading.Lock()
+
+def load_template(path: str, mode: str = "RGBA") -> Image.Image:
+    with _templates_lock:
+        key = (path, mode)
+        if key not in _templates:
+            with Image.open(path) as im:
+                _templates[key] = im.convert(mode)
+        return _templates[key]
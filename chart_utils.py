@@ -4,6 +4,7 @@ from PIL import Image, ImageDraw, ImageFont
 import os
 import math
 import logging
+from canvas_pool import canvas_pool, RENDER_MEMORY_MODE
 
 # --- LOG ---
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -13,6 +14,30 @@ CANVAS_W = 1800
 CANVAS_H = 1800
 MARGIN   = 80
 
+# --- RENKLER (palette modu için sabit palet) ---
+BG_COLOR     = (14, 16, 20)
+TITLE_COLOR  = (230, 235, 240)
+META_COLOR   = (200, 205, 210)
+FRAME_COLOR  = (70, 75, 85)
+CIRCLE_COLOR = (120, 125, 135)
+PLANET_COLOR = (220, 220, 220)
+LEGEND = [
+    ("Conjunction", "#FFD400"),
+    ("Sextile",     "#1DB954"),
+    ("Square",      "#E63946"),
+    ("Trine",       "#1E88E5"),
+    ("Opposition",  "#7B1FA2"),
+]
+
+def _hex_rgb(h: str):
+    return tuple(int(h[k:k + 2], 16) for k in (1, 3, 5))
+
+# Varsayılan havuzdaki RGB canvas. RENDER_PALETTE=1 ile 1 byte/piksel "P" canvas kullanılır;
+# bellek 4 kat azalır ama palet modunda metin antialiasing'i kaybolur (opt-in).
+RENDER_PALETTE = os.getenv("RENDER_PALETTE", "0") == "1"
+CHART_PALETTE = [c for rgb in (BG_COLOR, TITLE_COLOR, META_COLOR, FRAME_COLOR, CIRCLE_COLOR, PLANET_COLOR,
+                               *(_hex_rgb(col) for _label, col in LEGEND)) for c in rgb]
+
 def _load_font(preferred_path: str | None, size: int):
     """Güvenli font yükleyici (fallback: DejaVuSans -> Pillow default)."""
     try:
@@ -34,7 +59,18 @@ def draw_chart(
     Basit placeholder harita. Çıkış: PNG içeren BytesIO.
     """
     # --- ARKA PLAN ---
-    bg = Image.new("RGB", (CANVAS_W, CANVAS_H), (14, 16, 20))
+    if RENDER_MEMORY_MODE != "pooled":
+        bg = Image.new("RGB", (CANVAS_W, CANVAS_H), BG_COLOR)
+        return _draw_on(bg, planets, name, dob, tob, city, country)
+
+    if RENDER_PALETTE:
+        canvas = canvas_pool.canvas("P", (CANVAS_W, CANVAS_H), BG_COLOR, palette=CHART_PALETTE)
+    else:
+        canvas = canvas_pool.canvas("RGB", (CANVAS_W, CANVAS_H), BG_COLOR)
+    with canvas as bg:
+        return _draw_on(bg, planets, name, dob, tob, city, country)
+
+def _draw_on(bg: Image.Image, planets, name, dob, tob, city, country) -> BytesIO:
     draw = ImageDraw.Draw(bg)
 
     # --- FONTLAR ---
@@ -44,15 +80,15 @@ def draw_chart(
     small_font = _load_font(font_path, 32)
 
     # --- BAŞLIK & METADATA ---
-    draw.text((MARGIN, MARGIN), f"ASTRO CHART — {name}", fill=(230,235,240), font=title_font)
+    draw.text((MARGIN, MARGIN), f"ASTRO CHART — {name}", fill=TITLE_COLOR, font=title_font)
     meta = f"Date/Time (local): {dob} @ {tob} | Location: {city}, {country}"
-    draw.text((MARGIN, MARGIN + 110), meta, fill=(200,205,210), font=meta_font)
+    draw.text((MARGIN, MARGIN + 110), meta, fill=META_COLOR, font=meta_font)
 
     # --- DIŞ ÇERÇEVE + ANA ÇEMBER ---
-    draw.rectangle([MARGIN, MARGIN, CANVAS_W - MARGIN, CANVAS_H - MARGIN], outline=(70,75,85), width=3)
+    draw.rectangle([MARGIN, MARGIN, CANVAS_W - MARGIN, CANVAS_H - MARGIN], outline=FRAME_COLOR, width=3)
     cx, cy = CANVAS_W // 2, CANVAS_H // 2
     R = min(CANVAS_W, CANVAS_H) // 2 - 2 * MARGIN
-    draw.ellipse([cx - R, cy - R, cx + R, cy + R], outline=(120,125,135), width=4)
+    draw.ellipse([cx - R, cy - R, cx + R, cy + R], outline=CIRCLE_COLOR, width=4)
 
     # --- GEZEGEN ETİKETLERİ (placeholder: ecliptic_long varsa onu kullan) ---
     ring_r = int(R * 0.85)
@@ -62,17 +98,11 @@ def draw_chart(
         rad = math.radians(angle_deg)
         x = cx + ring_r * 0.95 * math.cos(rad)
         y = cy + ring_r * 0.95 * math.sin(rad)
-        draw.ellipse([x - 6, y - 6, x + 6, y + 6], fill=(220,220,220))
-        draw.text((x + 10, y - 10), p.get("name", f"P{i+1}"), fill=(220,220,220), font=small_font)
+        draw.ellipse([x - 6, y - 6, x + 6, y + 6], fill=PLANET_COLOR)
+        draw.text((x + 10, y - 10), p.get("name", f"P{i+1}"), fill=PLANET_COLOR, font=small_font)
 
     # --- LEGEND (en altta, %50 küçük) ---
-    legend = [
-        ("Conjunction", "#FFD400"),
-        ("Sextile",     "#1DB954"),
-        ("Square",      "#E63946"),
-        ("Trine",       "#1E88E5"),
-        ("Opposition",  "#7B1FA2"),
-    ]
+    legend = LEGEND
     # %50 küçült
     legend_font_size = max(12, int(getattr(small_font, "size", 32) * 0.5))
     legend_font = _load_font(font_path, legend_font_size)
@@ -2,17 +2,24 @@ import math
 import os
 from datetime import datetime
 from PIL import Image, ImageDraw, ImageFont
+from canvas_pool import canvas_pool, load_template, RENDER_MEMORY_MODE
 
 def draw_chart(name, dob, tob, city, country, planets, output_path="charts/chart_final.png"):
     print("=== 🌌 DRAW_CHART_V6 STARTED ===")
     print(f"Name: {name}, DOB: {dob}, TOB: {tob}, Location: {city}, {country}")
 
-    # 📄 Template ve Fontlar
-    template_path = "chart_template.png"
+    # 📄 Template: bir kez yüklenir; pooled modda her istek kopya yerine havuzdaki canvas'a yapıştırır
+    template = load_template("chart_template.png", "RGBA")
+    if RENDER_MEMORY_MODE != "pooled":
+        return _draw_on(template.copy(), name, dob, tob, city, country, planets, output_path)
+    with canvas_pool.canvas("RGBA", template.size, template=template) as img:
+        return _draw_on(img, name, dob, tob, city, country, planets, output_path)
+
+def _draw_on(img, name, dob, tob, city, country, planets, output_path):
+    # 📄 Fontlar
     astro_font_path = "AstroGadget.ttf"
     text_font_path = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
 
-    img = Image.open(template_path).convert("RGBA")
     W, H = img.size
 
     draw = ImageDraw.Draw(img)
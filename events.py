@@ -0,0 +1,210 @@
+# events.py
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+from itertools import islice
+import heapq
+import multiprocessing
+import os
+import threading
+import swisseph as swe
+
+from app import ZODIAC, PLANET_IDS, ASPECTS, EPHE_PATH, ensure_ephe
+
+# ====================================================
+#  🔭 Event Search (ingress / station / exact aspect)
+# ====================================================
+#
+#  Sabit ince adım yerine: adım boyu gezegen hızına göre seçilir
+#  (bir adımda ~STEP_DEG derece), işaret değişimi olan aralık
+#  bracket edilip Illinois (regula falsi) ile kök bulunur.
+
+EVENT_KINDS = ("ingress", "station", "aspect")
+
+STEP_DEG = 2.0          # bir adımda katedilecek yaklaşık yay (derece)
+MIN_STEP = 1.0 / 24     # gün
+MAX_STEP = {            # gün; en kısa retro/direkt periyodundan küçük olmalı
+    "Sun": 2.0, "Moon": 0.25, "Mercury": 1.0, "Venus": 2.0, "Mars": 3.0,
+    "Jupiter": 5.0, "Saturn": 5.0, "Uranus": 8.0, "Neptune": 8.0, "Pluto": 8.0
+}
+TOL_DAYS = 1.0 / 86400  # ~1 saniye
+MAX_ITER = 60
+
+# paralel arama için sunucu genelinde tek process pool (istek başına fork edilmez)
+EVENT_POOL_WORKERS = int(os.getenv("EVENT_POOL_WORKERS", str(os.cpu_count() or 1)))
+# tek isteğin tarayabileceği en uzun aralık (tüm gezegenler için ~0.07 s/yıl seri CPU)
+EVENTS_MAX_RANGE_DAYS = float(os.getenv("EVENTS_MAX_RANGE_DAYS", str(366 * 50)))
+
+def _angdiff(a: float, b: float) -> float:
+    return (a - b + 180.0) % 360.0 - 180.0
+
+def utc_from_jd(jd: float) -> str:
+    y, m, d, h = swe.revjul(jd)
+    dt = datetime(y, m, d) + timedelta(hours=h)
+    return dt.strftime("%Y-%m-%d %H:%M:%S UTC")
+
+def _flag(sidereal: bool) -> int:
+    flag = swe.FLG_SWIEPH | swe.FLG_SPEED
+    if sidereal:
+        swe.set_sid_mode(swe.SIDM_LAHIRI, 0, 0)
+        flag |= swe.FLG_SIDEREAL
+    return flag
+
+def ephemeris_covers(jd: float) -> bool:
+    """
+    jd kurulu .se1 dosyalarıyla mı hesaplanıyor? Kapsam dışında Swiss Ephemeris
+    sessizce daha düşük hassasiyetli Moshier'e düşer (retflag'de FLG_SWIEPH olmaz).
+    """
+    ensure_ephe()
+    for pid in (swe.SUN, swe.MOON):
+        try:
+            _xx, rf = swe.calc_ut(jd, pid, swe.FLG_SWIEPH)
+        except swe.Error:
+            return False
+        if not rf & swe.FLG_SWIEPH:
+            return False
+    return True
+
+def _find_root(f, a: float, b: float, fa: float, fb: float) -> float:
+    """fa ve fb zıt işaretli; Illinois varyantı regula falsi."""
+    c, side = a, 0
+    for _ in range(MAX_ITER):
+        c = (a * fb - b * fa) / (fb - fa)
+        fc = f(c)
+        if fc == 0 or b - a < TOL_DAYS:
+            return c
+        if (fc < 0) == (fb < 0):
+            b, fb = c, fc
+            if side == -1:
+                fa /= 2
+            side = -1
+        else:
+            a, fa = c, fc
+            if side == 1:
+                fb /= 2
+            side = 1
+    return c
+
+def _event(kind: str, planet: str, jd: float, **extra):
+    return {"type": kind, "planet": planet, "jd": round(jd, 6), "utc": utc_from_jd(jd), **extra}
+
+def _targets(kinds, natal: dict | None, aspects: dict):
+    """(hedef boylam, event üretici) listesi."""
+    targets = []
+    if "ingress" in kinds:
+        for k in range(12):
+            targets.append((k * 30.0, ("ingress", k)))
+    if "aspect" in kinds and natal:
+        for natal_name, natal_lon in natal.items():
+            for asp, angle in aspects.items():
+                for tgt in {(natal_lon + angle) % 360.0, (natal_lon - angle) % 360.0}:
+                    targets.append((tgt, ("aspect", natal_name, asp)))
+    return targets
+
+def _crossings(planet: str, body, targets, t0: float, lon0: float, t1: float, lon1: float):
+    found = []
+    for tgt, info in targets:
+        d0, d1 = _angdiff(lon0, tgt), _angdiff(lon1, tgt)
+        if (d0 < 0) == (d1 < 0) or abs(d1 - d0) >= 180.0:
+            continue
+        jd = _find_root(lambda t: _angdiff(body(t)[0], tgt), t0, t1, d0, d1)
+        direct = d1 > d0
+        if info[0] == "ingress":
+            k = info[1] if direct else (info[1] - 1) % 12
+            found.append(_event("ingress", planet, jd, sign=ZODIAC[k], retrograde=not direct))
+        else:
+            found.append(_event("aspect", planet, jd, natal=info[1], aspect=info[2], retrograde=not direct))
+    return found
+
+def scan_planet(planet: str, start_jd: float, end_jd: float, kinds=EVENT_KINDS,
+                natal: dict | None = None, aspects: dict | None = None, sidereal: bool = False):
+    """Tek gezegen için event'leri zaman sırasıyla, bulundukça üretir."""
+    pid = PLANET_IDS[planet]
+    flag = _flag(sidereal)
+    targets = _targets(kinds, natal, aspects or ASPECTS)
+
+    def body(t: float):
+        # StreamingResponse generator'ı her adımda farklı bir threadpool thread'inde sürebilir
+        ensure_ephe()
+        xx, _rf = swe.calc_ut(t, pid, flag)
+        return xx[0], xx[3]
+
+    t0 = start_jd
+    lon0, v0 = body(t0)
+    while t0 < end_jd:
+        step = min(MAX_STEP[planet], max(MIN_STEP, STEP_DEG / max(abs(v0), 1e-9)))
+        t1 = min(end_jd, t0 + step)
+        lon1, v1 = body(t1)
+
+        if (v0 < 0) != (v1 < 0):
+            # istasyon: aralığı ikiye böl ki geri dönüşlü geçişler kaçmasın
+            ts = _find_root(lambda t: body(t)[1], t0, t1, v0, v1)
+            lons, _vs = body(ts)
+            found = _crossings(planet, body, targets, t0, lon0, ts, lons)
+            if "station" in kinds:
+                found.append(_event("station", planet, ts, station="retrograde" if v1 < 0 else "direct",
+                                    ecliptic_long=round(lons % 360.0, 4)))
+            found += _crossings(planet, body, targets, ts, lons, t1, lon1)
+        else:
+            found = _crossings(planet, body, targets, t0, lon0, t1, lon1)
+
+        found.sort(key=lambda e: e["jd"])
+        yield from found
+        t0, lon0, v0 = t1, lon1, v1
+
+def search_events(start_jd: float, end_jd: float, planets=None, kinds=EVENT_KINDS,
+                  natal: dict | None = None, aspects: dict | None = None, sidereal: bool = False):
+    """Tüm gezegenler için event'ler; kronolojik sırada, lazy."""
+    gens = [scan_planet(p, start_jd, end_jd, kinds, natal, aspects, sidereal)
+            for p in (planets or PLANET_IDS)]
+    return heapq.merge(*gens, key=lambda e: e["jd"])
+
+def _init_worker():
+    # fork ile gelen ephemeris dosya handle'ları paylaşılmasın; her worker kendi açar
+    swe.close()
+    swe.set_ephe_path(EPHE_PATH)
+
+def _scan_chunk(planet, start_jd, end_jd, kinds, natal, aspects, sidereal):
+    return list(scan_planet(planet, start_jd, end_jd, kinds, natal, aspects, sidereal))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # threaded sunucudan fork etmek yerine spawn
+            _pool = ProcessPoolExecutor(max_workers=EVENT_POOL_WORKERS, initializer=_init_worker,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def search_events_parallel(start_jd: float, end_jd: float, planets=None, kinds=EVENT_KINDS,
+                           natal: dict | None = None, aspects: dict | None = None, sidereal: bool = False,
+                           workers: int = 4, chunk_days: float = 365.25):
+    """
+    Gezegen x alt-aralık parçalarını paylaşılan process pool'da tarar; bir arama aynı anda
+    en fazla `workers` parça çalıştırır. Her parça bittikçe event'leri kendi içinde sıralı
+    üretir (parçalar arası sıra garanti değil). Generator kapatılırsa bekleyen parçalar iptal edilir.
+    """
+    chunks = []
+    for p in (planets or PLANET_IDS):
+        a = start_jd
+        while a < end_jd:
+            b = min(end_jd, a + chunk_days)
+            chunks.append((p, a, b, tuple(kinds), natal, aspects, sidereal))
+            a = b
+
+    pool = _get_pool()
+    todo = iter(chunks)
+    pending = {pool.submit(_scan_chunk, *c) for c in islice(todo, max(1, workers))}
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                nxt = next(todo, None)
+                if nxt is not None:
+                    pending.add(pool.submit(_scan_chunk, *nxt))
+                yield from fut.result()
+    finally:
+        for fut in pending:
+            fut.cancel()
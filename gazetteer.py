@@ -0,0 +1,605 @@
+# gazetteer.py
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import unicodedata
+import zlib
+from bisect import bisect_left
+
+# ====================================================
+#  🗺️ Offline Gazetteer (GeoNames cities dump -> mmap index)
+# ====================================================
+#
+#  Dosya düzeni (little-endian, tüm bölümler 4-byte hizalı):
+#    header    : magic + N, K, M, S, T, P, C
+#    records   : N x (lat f32, lon f32, display_off u32, population u32, cc 2s)
+#    keys      : K x (norm_off u32, keymap_off u32, count u32)
+#    keymap    : M x u32  -> record index (her key için nüfusa göre azalan)
+#    hash      : S x (hash u32, key_idx+1 u32)   0 = boş slot, linear probing
+#    trigrams  : T x (tri_hash u32, post_off u32, count u32)  tri_hash'e göre sıralı
+#    tripost   : P x u32  -> key index
+#    countries : C x (norm_off u32, cc 2s)
+#    strings   : NUL ile ayrılmış UTF-8 blob
+
+MAGIC = b"MDGAZ01\0"
+HEADER   = struct.Struct("<8s7I")
+RECORD   = struct.Struct("<ffII2s2x")
+KEY      = struct.Struct("<III")
+U32      = struct.Struct("<I")
+SLOT     = struct.Struct("<II")
+TRIGRAM  = struct.Struct("<III")
+COUNTRY  = struct.Struct("<I2s2x")
+
+FUZZY_MIN_SCORE = 0.5
+FUZZY_MAX_KEYS  = 5
+
+_TRANSLATE = str.maketrans({"ı": "i", "ß": "ss", "ø": "o", "đ": "d", "ł": "l", "æ": "ae", "œ": "oe"})
+_NON_WORD  = re.compile(r"[\W_]+")
+
+def normalize_name(s: str) -> str:
+    """Büyük/küçük harf ve aksan duyarsız anahtar: 'İstanbul' -> 'istanbul'."""
+    s = unicodedata.normalize("NFKD", s.casefold().translate(_TRANSLATE))
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", s).strip()
+
+# ülke adı -> ISO kodu (GeoNames countryInfo.txt'den türetilmiş; dosya olmadan da
+# "Turkey", "Germany" gibi tam adlar çözülebilsin). countryInfo.txt verilirse üstüne yazar.
+# Satır: "CC Ad | Diğer ad | ..."
+_BUILTIN_COUNTRIES = """
+AD Andorra
+AE United Arab Emirates | UAE
+AF Afghanistan
+AG Antigua and Barbuda
+AI Anguilla
+AL Albania
+AM Armenia
+AO Angola
+AQ Antarctica
+AR Argentina
+AS American Samoa
+AT Austria
+AU Australia
+AW Aruba
+AX Aland Islands
+AZ Azerbaijan
+BA Bosnia and Herzegovina | Bosnia & Herzegovina
+BB Barbados
+BD Bangladesh
+BE Belgium
+BF Burkina Faso
+BG Bulgaria
+BH Bahrain
+BI Burundi
+BJ Benin
+BL Saint Barthelemy
+BM Bermuda
+BN Brunei
+BO Bolivia
+BQ Bonaire, Saint Eustatius and Saba | Caribbean Netherlands
+BR Brazil
+BS Bahamas
+BT Bhutan
+BV Bouvet Island
+BW Botswana
+BY Belarus
+BZ Belize
+CA Canada
+CC Cocos Islands | Cocos (Keeling) Islands
+CD Democratic Republic of the Congo | DR Congo | Congo (Dem. Rep.)
+CF Central African Republic
+CG Republic of the Congo | Congo
+CH Switzerland
+CI Ivory Coast | Côte d'Ivoire
+CK Cook Islands
+CL Chile
+CM Cameroon
+CN China
+CO Colombia
+CR Costa Rica
+CU Cuba
+CV Cabo Verde | Cape Verde
+CW Curaçao
+CX Christmas Island
+CY Cyprus
+CZ Czechia | Czech Republic
+DE Germany
+DJ Djibouti
+DK Denmark
+DM Dominica
+DO Dominican Republic
+DZ Algeria
+EC Ecuador
+EE Estonia
+EG Egypt
+EH Western Sahara
+ER Eritrea
+ES Spain
+ET Ethiopia
+FI Finland
+FJ Fiji
+FK Falkland Islands
+FM Micronesia
+FO Faroe Islands
+FR France
+GA Gabon
+GB United Kingdom | UK | Great Britain | Britain | England | Scotland | Wales | Northern Ireland
+GD Grenada
+GE Georgia
+GF French Guiana
+GG Guernsey
+GH Ghana
+GI Gibraltar
+GL Greenland
+GM Gambia
+GN Guinea
+GP Guadeloupe
+GQ Equatorial Guinea
+GR Greece
+GS South Georgia and the South Sandwich Islands
+GT Guatemala
+GU Guam
+GW Guinea-Bissau
+GY Guyana
+HK Hong Kong
+HM Heard Island and McDonald Islands
+HN Honduras
+HR Croatia
+HT Haiti
+HU Hungary
+ID Indonesia
+IE Ireland
+IL Israel
+IM Isle of Man
+IN India
+IO British Indian Ocean Territory
+IQ Iraq
+IR Iran
+IS Iceland
+IT Italy
+JE Jersey
+JM Jamaica
+JO Jordan
+JP Japan
+KE Kenya
+KG Kyrgyzstan
+KH Cambodia
+KI Kiribati
+KM Comoros
+KN Saint Kitts and Nevis
+KP North Korea
+KR South Korea | Republic of Korea
+KW Kuwait
+KY Cayman Islands
+KZ Kazakhstan
+LA Laos
+LB Lebanon
+LC Saint Lucia
+LI Liechtenstein
+LK Sri Lanka
+LR Liberia
+LS Lesotho
+LT Lithuania
+LU Luxembourg
+LV Latvia
+LY Libya
+MA Morocco
+MC Monaco
+MD Moldova
+ME Montenegro
+MF Saint Martin
+MG Madagascar
+MH Marshall Islands
+MK North Macedonia | Macedonia
+ML Mali
+MM Myanmar | Burma
+MN Mongolia
+MO Macao | Macau
+MP Northern Mariana Islands
+MQ Martinique
+MR Mauritania
+MS Montserrat
+MT Malta
+MU Mauritius
+MV Maldives
+MW Malawi
+MX Mexico
+MY Malaysia
+MZ Mozambique
+NA Namibia
+NC New Caledonia
+NE Niger
+NF Norfolk Island
+NG Nigeria
+NI Nicaragua
+NL Netherlands | Holland
+NO Norway
+NP Nepal
+NR Nauru
+NU Niue
+NZ New Zealand
+OM Oman
+PA Panama
+PE Peru
+PF French Polynesia
+PG Papua New Guinea
+PH Philippines
+PK Pakistan
+PL Poland
+PM Saint Pierre and Miquelon
+PN Pitcairn
+PR Puerto Rico
+PS Palestine | Palestinian Territory
+PT Portugal
+PW Palau
+PY Paraguay
+QA Qatar
+RE Reunion | Réunion
+RO Romania
+RS Serbia
+RU Russia | Russian Federation
+RW Rwanda
+SA Saudi Arabia
+SB Solomon Islands
+SC Seychelles
+SD Sudan
+SE Sweden
+SG Singapore
+SH Saint Helena
+SI Slovenia
+SJ Svalbard and Jan Mayen
+SK Slovakia
+SL Sierra Leone
+SM San Marino
+SN Senegal
+SO Somalia
+SR Suriname
+SS South Sudan
+ST Sao Tome and Principe
+SV El Salvador
+SX Sint Maarten
+SY Syria
+SZ Eswatini | Swaziland
+TC Turks and Caicos Islands
+TD Chad
+TF French Southern Territories
+TG Togo
+TH Thailand
+TJ Tajikistan
+TK Tokelau
+TL Timor Leste | East Timor
+TM Turkmenistan
+TN Tunisia
+TO Tonga
+TR Turkey | Türkiye | Turkiye
+TT Trinidad and Tobago
+TV Tuvalu
+TW Taiwan
+TZ Tanzania
+UA Ukraine
+UG Uganda
+UM United States Minor Outlying Islands
+US United States | USA | United States of America
+UY Uruguay
+UZ Uzbekistan
+VA Vatican | Vatican City | Holy See
+VC Saint Vincent and the Grenadines
+VE Venezuela
+VG British Virgin Islands
+VI U.S. Virgin Islands
+VN Vietnam | Viet Nam
+VU Vanuatu
+WF Wallis and Futuna
+WS Samoa
+YE Yemen
+YT Mayotte
+ZA South Africa
+ZM Zambia
+ZW Zimbabwe
+"""
+
+def builtin_countries() -> dict:
+    """Gömülü tablo: normalize ülke adı / ISO kodu -> ISO kodu."""
+    out = {}
+    for line in _BUILTIN_COUNTRIES.strip().splitlines():
+        cc, _, names = line.partition(" ")
+        out[normalize_name(cc)] = cc
+        for n in names.split("|"):
+            out[normalize_name(n)] = cc
+    return out
+
+def _hash(s: str) -> int:
+    return zlib.crc32(s.encode("utf-8"))
+
+def trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[k:k + 3] for k in range(len(padded) - 2)}
+
+# ====================================================
+#  🔨 BUILD
+# ====================================================
+def build_gazetteer(cities_path: str, out_path: str, country_info_path: str | None = None,
+                    alternate_names: bool = False):
+    """
+    GeoNames formatındaki cities dump'ını (cities15000.txt vb.) kompakt index dosyasına çevirir.
+    Ülke adları gömülü tablodan gelir; country_info_path (countryInfo.txt) verilirse onunla genişletilir.
+    """
+    records = []                 # (lat, lon, display, population, cc)
+    key_records = {}             # norm key -> [record idx]
+
+    with open(cities_path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 15:
+                continue
+            try:
+                lat, lon = float(cols[4]), float(cols[5])
+                population = int(cols[14] or 0)
+            except ValueError:
+                continue
+            idx = len(records)
+            records.append((lat, lon, cols[1], min(population, 0xFFFFFFFF), cols[8][:2].upper()))
+
+            names = {cols[1], cols[2]}
+            if alternate_names and cols[3]:
+                names.update(cols[3].split(","))
+            for n in names:
+                key = normalize_name(n)
+                if key:
+                    key_records.setdefault(key, []).append(idx)
+
+    countries = builtin_countries()
+    for _lat, _lon, _name, _pop, cc in records:
+        countries[normalize_name(cc)] = cc
+    if country_info_path:
+        with open(country_info_path, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("#"):
+                    continue
+                cols = line.rstrip("\n").split("\t")
+                if len(cols) > 4 and cols[0]:
+                    for n in (cols[0], cols[1], cols[4]):
+                        if n:
+                            countries[normalize_name(n)] = cols[0][:2].upper()
+
+    # --- strings ---
+    blob = bytearray()
+    def intern(s: str) -> int:
+        off = len(blob)
+        blob.extend(s.encode("utf-8") + b"\0")
+        return off
+
+    rec_bytes = bytearray()
+    for lat, lon, display, pop, cc in records:
+        rec_bytes += RECORD.pack(lat, lon, intern(display), pop, cc.encode("ascii", "replace").ljust(2))
+
+    # --- keys + keymap ---
+    key_list = sorted(key_records)
+    key_bytes, keymap = bytearray(), []
+    for key in key_list:
+        idxs = sorted(set(key_records[key]), key=lambda r: -records[r][3])
+        key_bytes += KEY.pack(intern(key), len(keymap), len(idxs))
+        keymap.extend(idxs)
+
+    # --- hash table ---
+    n_slots = 1
+    while n_slots < 2 * max(1, len(key_list)):
+        n_slots <<= 1
+    slots = [(0, 0)] * n_slots
+    for k, key in enumerate(key_list):
+        h = _hash(key)
+        pos = h & (n_slots - 1)
+        while slots[pos][1]:
+            pos = (pos + 1) & (n_slots - 1)
+        slots[pos] = (h, k + 1)
+
+    # --- trigram index ---
+    postings = {}
+    for k, key in enumerate(key_list):
+        for tri in trigrams(key):
+            postings.setdefault(_hash(tri), []).append(k)
+    tri_bytes, tripost = bytearray(), []
+    for th in sorted(postings):
+        tri_bytes += TRIGRAM.pack(th, len(tripost), len(postings[th]))
+        tripost.extend(postings[th])
+
+    country_bytes = bytearray()
+    for norm, cc in sorted(countries.items()):
+        country_bytes += COUNTRY.pack(intern(norm), cc.encode("ascii", "replace").ljust(2))
+
+    # birden fazla worker aynı anda derleyebilir: her biri kendi tmp dosyasına yazar,
+    # os.replace atomik olduğu için son yazan kazanır (içerik aynı)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(out_path) + ".",
+                                    dir=os.path.dirname(os.path.abspath(out_path)))
+    with os.fdopen(fd, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records), len(key_list), len(keymap), n_slots,
+                            len(postings), len(tripost), len(countries)))
+        f.write(rec_bytes)
+        f.write(key_bytes)
+        f.write(struct.pack(f"<{len(keymap)}I", *keymap))
+        f.write(b"".join(SLOT.pack(h, k) for h, k in slots))
+        f.write(tri_bytes)
+        f.write(struct.pack(f"<{len(tripost)}I", *tripost))
+        f.write(country_bytes)
+        f.write(blob)
+    try:
+        os.replace(tmp_path, out_path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+    return len(records)
+
+# ====================================================
+#  🔎 LOOKUP
+# ====================================================
+class Gazetteer:
+    """mmap'lenmiş gazetteer dosyası üzerinde şehir/ülke -> (lat, lon) çözümleyici."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, k, m, s, t, p, c = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Geçersiz gazetteer dosyası: {path}")
+        self.n_records, self.n_keys, self.n_slots, self.n_trigrams = n, k, s, t
+
+        off = HEADER.size
+        self._records  = off; off += n * RECORD.size
+        self._keys     = off; off += k * KEY.size
+        self._keymap   = off; off += m * U32.size
+        self._slots    = off; off += s * SLOT.size
+        self._trigrams = off; off += t * TRIGRAM.size
+        self._tripost  = off; off += p * U32.size
+        countries_off  = off; off += c * COUNTRY.size
+        self._strings  = off
+
+        # ülke tablosu küçük; dict olarak tutulur (gömülü tablo eski index dosyalarını da kapsar)
+        self._countries = builtin_countries()
+        for j in range(c):
+            norm_off, cc = COUNTRY.unpack_from(self._mm, countries_off + j * COUNTRY.size)
+            self._countries[self._string(norm_off)] = cc.decode("ascii")
+        # tri_hash alanı üzerinde bisect
+        self._tri_hashes = _StridedU32(self._mm, self._trigrams, TRIGRAM.size, t)
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def _string(self, off: int) -> str:
+        start = self._strings + off
+        end = self._mm.find(b"\0", start)
+        return self._mm[start:end].decode("utf-8")
+
+    def _record(self, idx: int):
+        lat, lon, display_off, population, cc = RECORD.unpack_from(self._mm, self._records + idx * RECORD.size)
+        return lat, lon, display_off, population, cc.decode("ascii")
+
+    def _key_records(self, k: int):
+        _norm_off, start, count = KEY.unpack_from(self._mm, self._keys + k * KEY.size)
+        base = self._keymap + start * U32.size
+        return struct.unpack_from(f"<{count}I", self._mm, base)
+
+    def _key(self, k: int) -> str:
+        norm_off, _start, _count = KEY.unpack_from(self._mm, self._keys + k * KEY.size)
+        return self._string(norm_off)
+
+    def find_key(self, key: str) -> int | None:
+        h = _hash(key)
+        mask = self.n_slots - 1
+        pos = h & mask
+        while True:
+            sh, kidx = SLOT.unpack_from(self._mm, self._slots + pos * SLOT.size)
+            if not kidx:
+                return None
+            if sh == h and self._key(kidx - 1) == key:
+                return kidx - 1
+            pos = (pos + 1) & mask
+
+    def fuzzy_keys(self, key: str, limit: int = FUZZY_MAX_KEYS, min_score: float = FUZZY_MIN_SCORE):
+        """Trigram Jaccard benzerliğine göre en yakın key index'leri."""
+        q = {_hash(tri) for tri in trigrams(key)}
+        shared = {}
+        for th in q:
+            j = bisect_left(self._tri_hashes, th)
+            if j >= self.n_trigrams or self._tri_hashes[j] != th:
+                continue
+            _th, start, count = TRIGRAM.unpack_from(self._mm, self._trigrams + j * TRIGRAM.size)
+            for kidx in struct.unpack_from(f"<{count}I", self._mm, self._tripost + start * U32.size):
+                shared[kidx] = shared.get(kidx, 0) + 1
+
+        scored = []
+        for kidx, n in shared.items():
+            score = n / (len(q) + len(trigrams(self._key(kidx))) - n)
+            if score >= min_score:
+                scored.append((score, kidx))
+        scored.sort(reverse=True)
+        return [kidx for _score, kidx in scored[:limit]]
+
+    def country_code(self, country: str | None) -> str | None:
+        if not country:
+            return None
+        return self._countries.get(normalize_name(country))
+
+    def _matches(self, kidx: int, cc: str | None):
+        for ridx in self._key_records(kidx):
+            lat, lon, display_off, population, rcc = self._record(ridx)
+            if cc is None or rcc == cc:
+                yield ridx, float(lat), float(lon), display_off, population, rcc
+
+    def lookup(self, city: str, country: str | None = None):
+        """
+        Sadece tam (normalize) eşleşme: (lat, lon) ya da None.
+        Ülke verilmiş ama çözülemiyorsa None döner; yanlış ülkedeki aynı adlı
+        şehri vermektense Google'a bırakmak daha güvenli.
+        """
+        key = normalize_name(city)
+        if not key:
+            return None
+        cc = self.country_code(country)
+        if country and country.strip() and cc is None:
+            return None
+
+        exact = self.find_key(key)
+        if exact is None:
+            return None
+        for _ridx, lat, lon, _display_off, _pop, _rcc in self._matches(exact, cc):
+            return lat, lon
+        return None
+
+    def suggest(self, city: str, country: str | None = None, limit: int = FUZZY_MAX_KEYS):
+        """Trigram benzerliğine göre öneriler (kullanıcıya gösterilmek için; çözümleme yapmaz)."""
+        key = normalize_name(city)
+        if not key:
+            return []
+        cc = self.country_code(country)
+        out, seen = [], set()
+        for kidx in self.fuzzy_keys(key, limit=limit):
+            for ridx, lat, lon, display_off, _pop, rcc in self._matches(kidx, cc):
+                if ridx not in seen:
+                    seen.add(ridx)
+                    out.append({"name": self._string(display_off), "country_code": rcc,
+                                "lat": round(lat, 4), "lon": round(lon, 4)})
+                break
+        return out[:limit]
+
+class _StridedU32:
+    """Sabit aralıklı u32 alanlarına bisect için sequence arayüzü."""
+
+    def __init__(self, buf, base: int, stride: int, length: int):
+        self._buf, self._base, self._stride, self._len = buf, base, stride, length
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, j: int) -> int:
+        return U32.unpack_from(self._buf, self._base + j * self._stride)[0]
+
+def open_gazetteer(path: str, source: str | None = None, country_info: str | None = None):
+    """
+    path varsa açar; yoksa ve source (cities dump) mevcutsa önce derler.
+    İkisi de yoksa None döner (çağıran Google'a düşer).
+    """
+    if not os.path.exists(path):
+        if not source or not os.path.exists(source):
+            return None
+        if country_info and not os.path.exists(country_info):
+            country_info = None
+        try:
+            build_gazetteer(source, path, country_info)
+        except OSError:
+            # başka bir worker yarışı kazanmış olabilir
+            if not os.path.exists(path):
+                raise
+    return Gazetteer(path)
+
+if __name__ == "__main__":
+    # python gazetteer.py cities15000.txt data/gazetteer.bin [countryInfo.txt]
+    if len(sys.argv) < 3:
+        print("Usage: python gazetteer.py <cities.txt> <out.bin> [countryInfo.txt]")
+        sys.exit(1)
+    n = build_gazetteer(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    print(f"✅ {n} cities -> {sys.argv[2]}")
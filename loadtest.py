@@ -0,0 +1,196 @@
+# loadtest.py
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+import requests
+
+# ====================================================
+#  📈 Load generator for the unified app (app2)
+# ====================================================
+#
+#  Önce mock Google'ı ve app2'yi mock'a yönlendirerek başlat:
+#    python mock_google.py --port 8099 --latency-ms 80
+#    GOOGLE_API_BASE=http://127.0.0.1:8099 GOOGLE_MAPS_API_KEY=mock API_KEY=test \
+#        uvicorn app2:app --port 8000 --workers 2
+#  Sonra:
+#    API_KEY=test python loadtest.py --rps 20 --duration 60 --mix compute=0.6,render=0.3,chart=0.1
+#  Tek API_KEY yalnızca pool kapasitesiyle sınırlıdır (bkz. admission.py); anahtar başına
+#  limitleri de ölçmek için API_KEYS_FILE ya da API_KEY_COMPUTE_RATE vb. kullan.
+
+CITIES = [
+    ("Istanbul", "Turkey"), ("Ankara", "Turkey"), ("Izmir", "Turkey"), ("London", "United Kingdom"),
+    ("Paris", "France"), ("Berlin", "Germany"), ("New York", "United States"), ("Tokyo", "Japan"),
+    ("Sydney", "Australia"), ("São Paulo", "Brazil"), ("Cairo", "Egypt"), ("Mumbai", "India"),
+]
+PLANETS = ["Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter", "Saturn", "Uranus", "Neptune", "Pluto"]
+
+def _birth_input():
+    city, country = random.choice(CITIES)
+    return {
+        "name": "Load Test",
+        "dob": f"{random.randint(1950, 2010)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}",
+        "tob": f"{random.randint(0, 23):02d}:{random.randint(0, 59):02d}",
+        "city": city,
+        "country": country,
+    }
+
+def _render_payload():
+    p = _birth_input()
+    p["planets"] = [{"name": n, "ecliptic_long": round(random.uniform(0, 360), 2)} for n in PLANETS]
+    return p
+
+# endpoint adı -> (path, payload üretici)
+ENDPOINTS = {
+    "compute": ("/compute/compute", _birth_input),
+    "render":  ("/render", _render_payload),
+    "chart":   ("/chart", _birth_input),
+}
+
+def percentile(sorted_vals: list, q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(q / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+def parse_mix(s: str) -> dict:
+    mix = {}
+    for part in s.split(","):
+        name, _, w = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint in --mix: {name} (choices: {', '.join(ENDPOINTS)})")
+        mix[name] = float(w or 1)
+    return mix
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}   # endpoint -> [saniye]
+        self.statuses = {}    # endpoint -> {status: count}
+
+    def add(self, endpoint: str, status, latency: float):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            st = self.statuses.setdefault(endpoint, {})
+            st[status] = st.get(status, 0) + 1
+
+    def report(self, elapsed: float) -> dict:
+        out = {}
+        with self._lock:
+            for ep, lats in self.latencies.items():
+                lats = sorted(lats)
+                statuses = self.statuses[ep]
+                ok = sum(n for s, n in statuses.items() if isinstance(s, int) and 200 <= s < 300)
+                total = len(lats)
+                out[ep] = {
+                    "requests": total,
+                    "ok": ok,
+                    "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+                    "error_rate": round((total - ok) / total, 4) if total else 0.0,
+                    "p50_ms": round(percentile(lats, 50) * 1000, 1),
+                    "p95_ms": round(percentile(lats, 95) * 1000, 1),
+                    "p99_ms": round(percentile(lats, 99) * 1000, 1),
+                    "statuses": {str(s): n for s, n in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+                }
+        return out
+
+_local = threading.local()
+
+def _session():
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+def fire(base_url: str, api_key: str, endpoint: str, rec: Recorder, timeout: float, due: float):
+    """Gecikme planlanan zamandan (due) ölçülür: thread havuzunda bekleme de dahil."""
+    path, make_payload = ENDPOINTS[endpoint]
+    try:
+        r = _session().post(base_url + path, json=make_payload(),
+                            headers={"Authorization": f"Bearer {api_key}"}, timeout=timeout)
+        status = r.status_code
+    except requests.RequestException as e:
+        status = type(e).__name__
+    rec.add(endpoint, status, time.perf_counter() - due)
+
+def run(base_url: str, api_key: str, rps: float, duration: float, concurrency: int, mix: dict,
+        timeout: float = 30.0) -> dict:
+    """
+    Open-loop yük: istekler yanıt beklenmeden sabit hızla planlanır ve gecikme
+    planlanan zamandan ölçülür; sunucu yavaşladığında istemci kuyruğunda geçen
+    süre de ölçüme yansır. late_dispatches: planından bir aralıktan fazla geç
+    gönderilen ya da tüm worker'lar doluyken kuyruğa düşen istekler.
+    """
+    rec = Recorder()
+    names, weights = list(mix), list(mix.values())
+    interval = 1.0 / rps
+    late = 0
+    inflight = 0
+    inflight_lock = threading.Lock()
+
+    def done(_):
+        nonlocal inflight
+        with inflight_lock:
+            inflight -= 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        n = 0
+        while True:
+            due = start + n * interval
+            if due - start >= duration:
+                break
+            now = time.perf_counter()
+            if due > now:
+                time.sleep(due - now)
+            with inflight_lock:
+                backlog = inflight >= concurrency
+                inflight += 1
+            if backlog or now - due > interval:
+                late += 1
+            fut = pool.submit(fire, base_url, api_key, random.choices(names, weights)[0], rec, timeout, due)
+            fut.add_done_callback(done)
+            n += 1
+        elapsed = time.perf_counter() - start
+    # kuyruktaki istekler bitene kadar geçen süre de dahil
+    total_elapsed = time.perf_counter() - start
+
+    return {
+        "target_rps": rps,
+        "duration_s": round(elapsed, 2),
+        "wall_s": round(total_elapsed, 2),
+        "sent": n,
+        "late_dispatches": late,
+        "endpoints": rec.report(total_elapsed),
+    }
+
+def print_report(result: dict):
+    print(f"🎯 target {result['target_rps']} rps | sent {result['sent']} in {result['duration_s']}s "
+          f"(wall {result['wall_s']}s, late dispatches {result['late_dispatches']})")
+    print(f"{'endpoint':<10}{'reqs':>7}{'ok':>7}{'rps':>8}{'err%':>8}{'p50':>9}{'p95':>9}{'p99':>9}  statuses")
+    for ep, r in result["endpoints"].items():
+        print(f"{ep:<10}{r['requests']:>7}{r['ok']:>7}{r['throughput_rps']:>8}{r['error_rate']*100:>7.1f}%"
+              f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}  {r['statuses']}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Load test for Madam Dudu Astro Core (app2)")
+    ap.add_argument("--base-url", default="http://127.0.0.1:8000")
+    ap.add_argument("--api-key", default=os.getenv("API_KEY", ""))
+    ap.add_argument("--rps", type=float, default=10.0)
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds")
+    ap.add_argument("--concurrency", type=int, default=64, help="max in-flight requests")
+    ap.add_argument("--mix", default="compute=0.6,render=0.3,chart=0.1")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--json", help="write the report to this file as JSON")
+    args = ap.parse_args()
+
+    result = run(args.base_url.rstrip("/"), args.api_key, args.rps, args.duration,
+                 args.concurrency, parse_mix(args.mix), args.timeout)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
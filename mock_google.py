@@ -0,0 +1,88 @@
+# mock_google.py
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+
+# ====================================================
+#  🧪 Local stand-in for Google Geocoding + Time Zone APIs
+# ====================================================
+#
+#  Load test için: GOOGLE_API_BASE=http://127.0.0.1:8099 ile app bu sunucuya yönlenir.
+#    python mock_google.py --port 8099 --latency-ms 80 --jitter-ms 40 --error-rate 0.01
+#  ya da: MOCK_LATENCY_MS=80 uvicorn mock_google:app --port 8099
+
+app = FastAPI(title="Mock Google Maps APIs", version="1.0.0")
+
+LATENCY_MS    = float(os.getenv("MOCK_LATENCY_MS", "50"))
+JITTER_MS     = float(os.getenv("MOCK_JITTER_MS", "20"))
+ERROR_RATE    = float(os.getenv("MOCK_ERROR_RATE", "0"))     # HTTP 500
+NOT_FOUND_RATE = float(os.getenv("MOCK_NOT_FOUND_RATE", "0")) # 200 + ZERO_RESULTS
+
+STATS = {"geocode": 0, "timezone": 0, "errors": 0}
+
+async def _simulate():
+    """Gecikme + hata enjeksiyonu. Hata yanıtı döndürülecekse onu verir."""
+    delay = max(0.0, LATENCY_MS + random.uniform(-JITTER_MS, JITTER_MS))
+    await asyncio.sleep(delay / 1000.0)
+    if random.random() < ERROR_RATE:
+        STATS["errors"] += 1
+        return JSONResponse({"status": "UNKNOWN_ERROR"}, status_code=500)
+    if random.random() < NOT_FOUND_RATE:
+        STATS["errors"] += 1
+        return JSONResponse({"status": "ZERO_RESULTS", "results": []})
+    return None
+
+def _fake_latlon(address: str):
+    # aynı adres her zaman aynı koordinat
+    h = hashlib.sha256(address.casefold().encode("utf-8")).digest()
+    lat = int.from_bytes(h[:4], "big") / 2**32 * 120.0 - 60.0
+    lng = int.from_bytes(h[4:8], "big") / 2**32 * 360.0 - 180.0
+    return round(lat, 6), round(lng, 6)
+
+@app.get("/maps/api/geocode/json")
+async def geocode(address: str = Query(...), key: str | None = None):
+    STATS["geocode"] += 1
+    err = await _simulate()
+    if err is not None:
+        return err
+    lat, lng = _fake_latlon(address)
+    return {
+        "status": "OK",
+        "results": [{"formatted_address": address, "geometry": {"location": {"lat": lat, "lng": lng}}}],
+    }
+
+@app.get("/maps/api/timezone/json")
+async def timezone(location: str = Query(...), timestamp: int = 0, key: str | None = None):
+    STATS["timezone"] += 1
+    err = await _simulate()
+    if err is not None:
+        return err
+    lng = float(location.split(",")[1])
+    offset = max(-12, min(14, round(lng / 15.0)))
+    # Etc/GMT işareti ters: Etc/GMT-3 = UTC+3
+    tzid = "Etc/GMT" if offset == 0 else f"Etc/GMT{-offset:+d}"
+    return {"status": "OK", "timeZoneId": tzid, "rawOffset": offset * 3600, "dstOffset": 0}
+
+@app.get("/stats")
+def stats():
+    return STATS
+
+if __name__ == "__main__":
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description="Mock Google Geocoding / Time Zone server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("--latency-ms", type=float, default=LATENCY_MS)
+    ap.add_argument("--jitter-ms", type=float, default=JITTER_MS)
+    ap.add_argument("--error-rate", type=float, default=ERROR_RATE)
+    ap.add_argument("--not-found-rate", type=float, default=NOT_FOUND_RATE)
+    args = ap.parse_args()
+
+    LATENCY_MS, JITTER_MS = args.latency_ms, args.jitter_ms
+    ERROR_RATE, NOT_FOUND_RATE = args.error_rate, args.not_found_rate
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,140 @@
+import json
+import math
+import pytest
+from fastapi import HTTPException
+import admission as adm
+from admission import AdmissionController, KeyInfo, Limits, StaticKeyRegistry, TokenBucket, _digest
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = FakeClock()
+    monkeypatch.setattr(adm.time, "monotonic", c)
+    return c
+
+def _key(name, priority="interactive", rate=100.0, burst=100.0, concurrency=100):
+    limits = {pool: Limits(rate, burst, concurrency) for pool in adm.POOLS}
+    return KeyInfo(name, _digest(name + "-secret"), priority, limits)
+
+def _auth(name):
+    return f"Bearer {name}-secret"
+
+def _controller(*keys, capacity=8, bulk_share=0.75):
+    return AdmissionController(StaticKeyRegistry(list(keys)),
+                               capacity={"compute": capacity, "render": capacity}, bulk_share=bulk_share)
+
+def _status(fn):
+    with pytest.raises(HTTPException) as exc:
+        fn()
+    return exc.value
+
+def test_bucket_refills_at_rate(clock):
+    b = TokenBucket(rate=2.0, burst=3.0)
+    assert [b.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert b.take() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert b.take() == 0.0
+    # uzun bekleme burst'ü aşmaz
+    clock.now += 60
+    assert [b.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert b.take() > 0
+
+def test_rate_limit_rejects_with_retry_after(clock):
+    ac = _controller(_key("a", rate=1.0, burst=2.0))
+    ac.acquire("compute", _auth("a")).release()
+    ac.acquire("compute", _auth("a")).release()
+    err = _status(lambda: ac.acquire("compute", _auth("a")))
+    assert err.status_code == 429
+    assert err.headers["Retry-After"] == "1"
+    clock.now += 1.0
+    ac.acquire("compute", _auth("a")).release()
+    assert ac.stats()["compute"]["rejected"] == 1
+
+def test_concurrency_cap_per_key(clock):
+    ac = _controller(_key("a", concurrency=2), _key("b", concurrency=2))
+    t1 = ac.acquire("compute", _auth("a"))
+    t2 = ac.acquire("compute", _auth("a"))
+    assert _status(lambda: ac.acquire("compute", _auth("a"))).status_code == 429
+    # başka anahtar ve başka pool etkilenmez
+    ac.acquire("compute", _auth("b")).release()
+    ac.acquire("render", _auth("a")).release()
+    t1.release()
+    t1.release()   # ikinci release sayacı bozmaz
+    ac.acquire("compute", _auth("a")).release()
+    t2.release()
+    assert ac.stats()["compute"]["inflight"] == 0
+
+def test_bulk_share_reserves_capacity_for_interactive(clock):
+    ac = _controller(_key("batch", priority="bulk"), _key("gpt"), capacity=8, bulk_share=0.75)
+    bulk = [ac.acquire("compute", _auth("batch")) for _ in range(6)]
+    assert _status(lambda: ac.acquire("compute", _auth("batch"))).status_code == 429
+    interactive = [ac.acquire("compute", _auth("gpt")) for _ in range(2)]
+    assert _status(lambda: ac.acquire("compute", _auth("gpt"))).status_code == 429
+    for t in bulk + interactive:
+        t.release()
+    assert ac.stats()["compute"]["inflight"] == 0
+
+def test_multi_slot_ticket(clock):
+    ac = _controller(_key("a", concurrency=4), capacity=8)
+    info = ac.authenticate(_auth("a"))
+    assert ac.max_slots(info, "compute") == 4
+    t = ac.acquire("compute", _auth("a"), slots=3)
+    assert ac.stats()["compute"]["inflight"] == 3
+    assert _status(lambda: ac.acquire("compute", _auth("a"), slots=2)).status_code == 429
+    ac.acquire("compute", _auth("a")).release()
+    t.release()
+    assert ac.stats()["compute"]["inflight"] == 0
+
+def test_auth_errors():
+    ac = _controller(_key("a"))
+    assert _status(lambda: ac.acquire("compute", None)).status_code == 401
+    assert _status(lambda: ac.acquire("compute", "Bearer nope")).status_code == 403
+    assert _status(lambda: _controller().acquire("compute", _auth("a"))).status_code == 500
+
+def test_legacy_key_is_unlimited_unless_configured(monkeypatch):
+    monkeypatch.delenv("API_KEYS_FILE", raising=False)
+    monkeypatch.setenv("API_KEY", "legacy")
+    monkeypatch.setenv("API_KEY_RENDER_RATE", "3")
+    info = adm.registry_from_env().lookup("legacy")
+    assert math.isinf(info.limits["compute"].rate)
+    assert info.limits["render"].rate == 3.0
+    ac = AdmissionController(adm.registry_from_env(), capacity={"compute": 64, "render": 8})
+    tickets = [ac.acquire("compute", "Bearer legacy") for _ in range(64)]
+    assert ac.max_slots(info, "compute") == 64
+    for t in tickets:
+        t.release()
+
+def test_missing_keys_file_fails(monkeypatch, tmp_path):
+    monkeypatch.setenv("API_KEYS_FILE", str(tmp_path / "missing.json"))
+    with pytest.raises(FileNotFoundError):
+        adm.registry_from_env()
+
+def test_custom_registry_only_needs_lookup():
+    class DbRegistry(adm.KeyRegistry):
+        def lookup(self, token):
+            return _key("db") if token == "db-secret" else None
+
+    ac = AdmissionController(DbRegistry())
+    ac.acquire("compute", _auth("db")).release()
+    assert _status(lambda: ac.acquire("compute", "Bearer nope")).status_code == 403
+    with pytest.raises(TypeError):
+        adm.KeyRegistry()
+
+def test_same_name_keys_do_not_share_limits(tmp_path, clock):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"keys": [
+        {"name": "key1", "key": "first", "compute": {"rate": 1, "burst": 1, "concurrency": 1}},
+        {"key": "second", "compute": {"rate": 1, "burst": 1, "concurrency": 1}},   # otomatik ad: key1
+    ]}))
+    ac = AdmissionController(StaticKeyRegistry.from_file(str(path)))
+    t1 = ac.acquire("compute", "Bearer first")
+    t2 = ac.acquire("compute", "Bearer second")
+    assert _status(lambda: ac.acquire("compute", "Bearer first")).status_code == 429
+    t1.release()
+    t2.release()
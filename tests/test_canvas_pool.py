@@ -0,0 +1,71 @@
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+
+import chart_utils
+from canvas_pool import CanvasPool, canvas_bytes
+
+SMALL = (10, 10)   # "L": 100 byte
+
+def test_idle_canvas_of_other_key_is_evicted():
+    pool = CanvasPool(budget_bytes=150)
+    with pool.canvas("L", SMALL):
+        pass
+    with pool.canvas("L", (5, 10)):   # 50 byte sığar, eviction yok
+        pass
+    assert pool.evictions == 0
+    with pool.canvas("L", (10, 12)):  # 120 byte: boştakiler atılmalı
+        pass
+    assert pool.evictions == 2
+    stats = pool.stats()
+    assert stats["in_use_mb"] == 0
+    assert pool._allocated == canvas_bytes("L", (10, 12))
+
+def test_waits_for_release_when_budget_is_full():
+    pool = CanvasPool(budget_bytes=100, wait_timeout=5)
+    first = pool.acquire("L", SMALL)
+    got = []
+    t = threading.Thread(target=lambda: got.append(pool.acquire("L", (10, 9))))
+    t.start()
+    time.sleep(0.1)
+    assert not got and pool.waits >= 1
+    pool.release(first)
+    t.join(2)
+    assert got
+    pool.release(got[0])
+    assert pool._in_use == 0
+
+def test_wait_times_out_with_503():
+    pool = CanvasPool(budget_bytes=100, wait_timeout=0.05)
+    held = pool.acquire("L", SMALL)
+    with pytest.raises(HTTPException) as exc:
+        pool.acquire("L", (10, 9))
+    assert exc.value.status_code == 503
+    assert "Retry-After" in exc.value.headers
+    assert pool.stats()["timeouts"] == 1
+    pool.release(held)
+    assert pool._in_use == 0
+
+def test_oversized_canvas_is_allowed_alone():
+    pool = CanvasPool(budget_bytes=10)
+    with pool.canvas("L", SMALL) as img:
+        assert img.size == SMALL
+    assert pool._in_use == 0
+    # bütçe aşıldığı için havuzda tutulmaz
+    assert pool._allocated == 0
+
+def _draw(name):
+    planets = [{"name": "Sun", "ecliptic_long": 10.0}, {"name": "Moon", "ecliptic_long": 200.0}]
+    return chart_utils.draw_chart(planets, name, "2000-01-01", "12:00", "Istanbul", "Turkey").getvalue()
+
+@pytest.mark.parametrize("palette", [False, True])
+def test_reused_canvas_is_fully_reset(monkeypatch, palette):
+    monkeypatch.setattr(chart_utils, "RENDER_PALETTE", palette)
+    monkeypatch.setattr(chart_utils, "canvas_pool", CanvasPool(budget_bytes=64 * 2**20))
+    first = _draw("Ada")
+    _draw("Someone Else With A Long Name")
+    again = _draw("Ada")
+    assert chart_utils.canvas_pool.reuses == 2
+    assert first == again
+    assert chart_utils.canvas_pool.stats()["in_use_mb"] == 0
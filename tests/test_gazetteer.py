@@ -0,0 +1,97 @@
+import threading
+import pytest
+from gazetteer import Gazetteer, build_gazetteer, normalize_name, open_gazetteer
+
+CITIES = [
+    # geonameid, name, asciiname, alternatenames, lat, lon, cc, population
+    ("745044", "İstanbul", "Istanbul", "", 41.01384, 28.94966, "TR", 15701602),
+    ("750269", "Bursa", "Bursa", "", 40.19559, 29.06013, "TR", 1412701),
+    ("2643743", "London", "London", "", 51.50853, -0.12574, "GB", 8961989),
+    ("6058560", "London", "London", "", 42.98339, -81.23304, "CA", 346765),
+    ("3081368", "Wrocław", "Wroclaw", "", 51.1, 17.03333, "PL", 634893),
+]
+
+def _write_fixture(tmp_path, with_country_info=True):
+    cities = tmp_path / "cities.txt"
+    with open(cities, "w", encoding="utf-8") as f:
+        for gid, name, ascii_name, alt, lat, lon, cc, pop in CITIES:
+            cols = [gid, name, ascii_name, alt, str(lat), str(lon), "P", "PPL", cc] + [""] * 5 + [str(pop)] + [""] * 4
+            f.write("\t".join(cols) + "\n")
+    info = None
+    if with_country_info:
+        info = tmp_path / "countryInfo.txt"
+        info.write_text(
+            "#ISO\tISO3\tISO-Numeric\tfips\tCountry\n"
+            "TR\tTUR\t792\tTU\tTurkey\n"
+            "GB\tGBR\t826\tUK\tUnited Kingdom\n"
+            "CA\tCAN\t124\tCA\tCanada\n",
+            encoding="utf-8",
+        )
+    return str(cities), (str(info) if info else None)
+
+@pytest.fixture
+def gz(tmp_path):
+    cities, info = _write_fixture(tmp_path)
+    out = str(tmp_path / "gz.bin")
+    build_gazetteer(cities, out, info)
+    g = Gazetteer(out)
+    yield g
+    g.close()
+
+def test_normalize_name_diacritics():
+    assert normalize_name("İstanbul") == normalize_name("ISTANBUL") == "istanbul"
+    assert normalize_name("Wrocław") == "wroclaw"
+
+def test_lookup_diacritic_insensitive(gz):
+    lat, lon = gz.lookup("Istanbul", "Turkey")
+    assert lat == pytest.approx(41.01384, abs=1e-4)
+    assert lon == pytest.approx(28.94966, abs=1e-4)
+    assert gz.lookup("İSTANBUL", "TR") == gz.lookup("istanbul", "turkey")
+    assert gz.lookup("wroclaw") is not None
+
+def test_country_filter(gz):
+    assert gz.lookup("London", "Canada")[1] == pytest.approx(-81.23304, abs=1e-4)
+    assert gz.lookup("London", "GB")[1] == pytest.approx(-0.12574, abs=1e-4)
+    # ülke biliniyor ama o ülkede böyle bir şehir yok
+    assert gz.lookup("Bursa", "Canada") is None
+
+def test_unresolvable_country_misses(gz):
+    # yanlış ülkedeki aynı adlı şehri döndürmek yerine Google'a bırakır
+    assert gz.lookup("London", "Kanada") is None
+
+def test_country_names_without_country_info(tmp_path):
+    # countryInfo.txt olmadan da gömülü tablo tam ülke adlarını çözer
+    cities, _info = _write_fixture(tmp_path, with_country_info=False)
+    out = str(tmp_path / "gz.bin")
+    build_gazetteer(cities, out)
+    g = Gazetteer(out)
+    assert g.lookup("London", "Canada")[1] == pytest.approx(-81.23304, abs=1e-4)
+    assert g.lookup("London", "United Kingdom") == g.lookup("London", "GB")
+    assert g.lookup("İstanbul", "Türkiye") == g.lookup("Istanbul", "Turkey")
+    assert g.lookup("London", "CA") is not None
+    g.close()
+
+def test_fuzzy_is_suggestion_only(gz):
+    assert gz.lookup("Bursal", "Turkey") is None
+    names = [s["name"] for s in gz.suggest("Bursal", "Turkey")]
+    assert names == ["Bursa"]
+
+def test_concurrent_builds_do_not_fail(tmp_path):
+    cities, info = _write_fixture(tmp_path)
+    out = str(tmp_path / "gz.bin")
+    errors, opened = [], []
+
+    def worker():
+        try:
+            opened.append(open_gazetteer(out, cities, info))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert all(g.lookup("Bursa", "Turkey") is not None for g in opened)
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith("gz.bin.")] == []
@@ -0,0 +1,74 @@
+import os
+import pytest
+import swisseph as swe
+from fastapi import HTTPException
+
+from conftest import ROOT
+import app
+
+@pytest.fixture(autouse=True)
+def ephe():
+    swe.set_ephe_path(os.path.join(ROOT, "ephe"))
+    swe.set_sid_mode(swe.SIDM_LAHIRI, 0, 0)
+
+JD = swe.julday(1990, 5, 1, 7.0)
+LAT, LON = 41.0, 29.0
+CODES = {"Placidus": b'P', "Koch": b'K', "Porphyry": b'O', "Equal": b'E'}
+TOL = 0.006  # cusps 2 haneye yuvarlanıyor
+
+def _angle_diff(a: float, b: float) -> float:
+    return abs((a - b + 180.0) % 360.0 - 180.0)
+
+@pytest.mark.parametrize("system", list(CODES))
+def test_tropical_cusps_match_swe_houses(system):
+    frame = app.HouseFrame(JD, LAT, LON)
+    cusps, ascmc = swe.houses(JD, LAT, LON, CODES[system])
+    assert _angle_diff(frame.asc, ascmc[0]) < 1e-6
+    assert _angle_diff(frame.mc, ascmc[1]) < 1e-6
+    for got, expected in zip(frame.cusps(system), cusps[:12]):
+        assert _angle_diff(got, expected) < TOL
+
+@pytest.mark.parametrize("system", list(CODES))
+def test_sidereal_cusps_match_houses_ex(system):
+    frame = app.HouseFrame(JD, LAT, LON, sidereal=True)
+    cusps, ascmc = swe.houses_ex(JD, LAT, LON, CODES[system], swe.FLG_SIDEREAL)
+    assert _angle_diff(frame.asc, ascmc[0]) < 1e-6
+    assert _angle_diff(frame.mc, ascmc[1]) < 1e-6
+    for got, expected in zip(frame.cusps(system), cusps[:12]):
+        assert _angle_diff(got, expected) < TOL
+
+def test_whole_sign_anchors_on_sidereal_rising_sign():
+    tropical = app.HouseFrame(JD, LAT, LON)
+    sidereal = app.HouseFrame(JD, LAT, LON, sidereal=True)
+    _cusps, ascmc = swe.houses_ex(JD, LAT, LON, b'W', swe.FLG_SIDEREAL)
+    # tropikal ASC İkizler, sidereal ASC Boğa: ev 1 farklı burçta başlar
+    assert app.sign_index_from_lon(tropical.asc) != app.sign_index_from_lon(sidereal.asc)
+    assert sidereal.cusps("WholeSign")[0] == app.sign_index_from_lon(ascmc[0]) * 30.0
+    assert sidereal.cusps("WholeSign") == app.build_whole_sign_cusps(app.sign_index_from_lon(sidereal.asc))
+
+def test_unsupported_system_at_high_latitude():
+    frame = app.HouseFrame(JD, 70.0, 19.0)
+    assert "error" in frame.payload("Koch")
+    assert "error" in frame.payload("Placidus")
+    assert len(frame.payload("Equal")["cusps_longitudes"]) == 12
+    assert len(frame.payload("WholeSign")["cusps_longitudes"]) == 12
+
+@pytest.fixture
+def tromso(monkeypatch):
+    monkeypatch.setattr(app, "geocode_to_latlon", lambda city, country: (69.65, 18.96))
+    monkeypatch.setattr(app, "latlon_to_tzid", lambda lat, lon, ts: "Europe/Oslo")
+
+def _input(**kw):
+    return app.Input(dob="1990-01-15", tob="12:00", city="Tromsø", country="Norway", **kw)
+
+def test_extra_system_failure_keeps_chart(tromso):
+    result = app.compute_positions(_input(house_system="WholeSign", house_systems=["WholeSign", "Equal", "Koch"]))
+    systems = result["house_systems"]
+    assert "cusps_longitudes" in systems["WholeSign"] and "cusps_longitudes" in systems["Equal"]
+    assert "error" in systems["Koch"]
+    assert len(result["planets"]) == len(app.PLANET_IDS)
+
+def test_primary_system_failure_is_400(tromso):
+    with pytest.raises(HTTPException) as exc:
+        app.compute_positions(_input(house_system="Koch"))
+    assert exc.value.status_code == 400